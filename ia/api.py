@@ -0,0 +1,246 @@
+import os
+import json
+import asyncio
+import logging
+import threading
+import argparse
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+
+# Charger les variables d'environnement au plus tôt
+load_dotenv()
+
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from src.warmup import start_warmup, wait_until_ready, get_warmup_status
+from src.rag_chain import aquery_rag, summarize_history, get_cache_stats
+from src.utils.history_manager import fold_history, pending_turns
+from src.utils.db_manager import (
+    create_new_session, save_chat, get_chat_messages, get_session_owner,
+    get_session_summary, save_session_summary, get_user_from_token
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Conversations traitées simultanément par worker, et requêtes pouvant attendre leur tour
+MAX_ACTIVE_REQUESTS = int(os.getenv("API_MAX_ACTIVE_REQUESTS", "16"))
+MAX_QUEUED_REQUESTS = int(os.getenv("API_MAX_QUEUED_REQUESTS", "64"))
+
+
+class RequestLimiter:
+    """File d'attente bornée : au-delà de max_queued requêtes en attente, on refuse (503)."""
+
+    def __init__(self, max_active, max_queued):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.active = 0
+        self.queued = 0
+        self._semaphore = asyncio.Semaphore(max_active)
+
+    def try_enqueue(self):
+        """
+        Réserve une place dans la file, ou retourne None si elle est pleine. Vérification
+        et incrément sans await entre les deux : une rafale ne peut pas dépasser max_queued.
+        """
+        if self.queued >= self.max_queued:
+            return None
+        self.queued += 1
+        return {"queued": True}
+
+    def dequeue(self, ticket):
+        """Rend la place réservée (une seule fois par ticket)."""
+        if ticket["queued"]:
+            ticket["queued"] = False
+            self.queued -= 1
+
+    async def acquire(self, ticket):
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.dequeue(ticket)
+        self.active += 1
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+
+class QueuedStreamingResponse(StreamingResponse):
+    """Rend la place réservée dans la file même si le corps n'est jamais lu (client déconnecté avant l'envoi)."""
+
+    def __init__(self, content, ticket, **kwargs):
+        super().__init__(content, **kwargs)
+        self.ticket = ticket
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            limiter.dequeue(self.ticket)
+
+
+limiter = RequestLimiter(MAX_ACTIVE_REQUESTS, MAX_QUEUED_REQUESTS)
+state = {"ready": False}
+# Sessions dont le résumé est en cours de mise à jour (un seul résumé à la fois par session)
+_folding_sessions = set()
+_folding_lock = threading.Lock()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Base vectorielle et modèle d'embedding chargés une seule fois par worker
+    start_warmup()
+    vectorstore = await asyncio.get_running_loop().run_in_executor(None, wait_until_ready)
+    state["ready"] = vectorstore is not None
+    logger.info(f"Worker {os.getpid()} prêt (base vectorielle {'chargée' if state['ready'] else 'indisponible'}).")
+    yield
+
+
+app = FastAPI(title="Tèwou Agro-Assistant API", lifespan=lifespan)
+
+
+class ChatRequest(BaseModel):
+    question: str
+    soil_type: str = "Non spécifié"
+    location: str = "Sénégal"
+    session_id: str | None = None
+
+
+bearer = HTTPBearer(auto_error=False)
+
+
+async def current_user(credentials: HTTPAuthorizationCredentials | None = Depends(bearer)):
+    """Utilisateur Supabase authentifié par le jeton d'accès (Authorization: Bearer <JWT>)."""
+    user = None
+    if credentials is not None:
+        user = await asyncio.get_running_loop().run_in_executor(
+            None, get_user_from_token, credentials.credentials
+        )
+    if user is None:
+        raise HTTPException(status_code=401, detail="Authentification requise.",
+                            headers={"WWW-Authenticate": "Bearer"})
+    return user
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _load_session(session_id):
+    """Historique (échanges non résumés) et résumé glissant d'une session."""
+    messages = get_chat_messages(session_id)
+    history = [(m["content"], r["content"]) for m, r in zip(messages[::2], messages[1::2])]
+    summary, summarized_turns = get_session_summary(session_id)
+    return messages, history, summary, summarized_turns
+
+
+def _update_summary(session_id, history, summary, summarized_turns):
+    """Exécuté en arrière-plan après l'événement done : aucune exception ne doit s'en échapper."""
+    with _folding_lock:
+        if session_id in _folding_sessions:
+            return
+        _folding_sessions.add(session_id)
+    try:
+        new_summary, new_turns = fold_history(history, summary, summarized_turns, summarize_history)
+        if new_turns != summarized_turns:
+            save_session_summary(session_id, new_summary, new_turns)
+    except Exception as e:
+        logger.error(f"Erreur mise à jour du résumé de la session {session_id}: {e}")
+    finally:
+        with _folding_lock:
+            _folding_sessions.discard(session_id)
+
+
+async def _stream_chat(request, session_id, user_id, ticket):
+    loop = asyncio.get_running_loop()
+    try:
+        await limiter.acquire(ticket)
+    except asyncio.CancelledError:
+        logger.info(f"Session {session_id} : client déconnecté avant le début de la génération.")
+        raise
+    try:
+        messages, history, summary, summarized_turns = await loop.run_in_executor(
+            None, _load_session, session_id
+        )
+        yield _sse("session", {"session_id": session_id})
+
+        answer = []
+        async for event in aquery_rag(
+            request.question, soil_type=request.soil_type, location=request.location,
+            chat_history=pending_turns(history, summarized_turns), history_summary=summary
+        ):
+            if event["type"] == "chunk":
+                answer.append(event["content"])
+            yield _sse(event["type"], event)
+
+        full_answer = "".join(answer)
+        messages = messages + [
+            {"role": "user", "content": request.question},
+            {"role": "assistant", "content": full_answer},
+        ]
+        # Messages enregistrés avant done : le tour suivant du client relit l'historique à jour
+        await loop.run_in_executor(None, lambda: save_chat(session_id, messages, user_id=user_id))
+        # Seul le résumé (appel au LLM) est fait en arrière-plan
+        loop.run_in_executor(
+            None, _update_summary, session_id,
+            history + [(request.question, full_answer)], summary, summarized_turns
+        )
+        yield _sse("done", {"session_id": session_id})
+    except Exception as e:
+        logger.error(f"Erreur pendant la génération: {e}")
+        yield _sse("error", {"type": "error", "content": str(e)})
+    finally:
+        limiter.release()
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest, user=Depends(current_user)):
+    """Diffuse les événements de query_rag (status/chunk) en Server-Sent Events."""
+    user_id = str(user.id)
+    session_id = request.session_id
+    if session_id:
+        # Une session existante n'est lue ou réécrite que par son propriétaire
+        exists, owner = await asyncio.get_running_loop().run_in_executor(
+            None, get_session_owner, session_id
+        )
+        if exists and owner != user_id:
+            raise HTTPException(status_code=404, detail="Session introuvable.")
+    else:
+        session_id = create_new_session()
+    # Réservée juste avant de créer la réponse : plus aucun await ni exception possible entre les deux
+    ticket = limiter.try_enqueue()
+    if ticket is None:
+        raise HTTPException(status_code=503, detail="Serveur saturé, réessayez plus tard.",
+                            headers={"Retry-After": "5"})
+    return QueuedStreamingResponse(
+        _stream_chat(request, session_id, user_id, ticket),
+        ticket,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/health")
+async def health():
+    return {
+        "ready": state["ready"],
+        "pid": os.getpid(),
+        "active_requests": limiter.active,
+        "queued_requests": limiter.queued,
+        "warmup": get_warmup_status(),
+        "caches": get_cache_stats(),
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description="API HTTP (SSE) de Tèwou Agro-Assistant")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processus workers (chacun charge son propre modèle)")
+    args = parser.parse_args()
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers)
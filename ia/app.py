@@ -1,22 +1,30 @@
-import streamlit as st
+from src.utils import startup_profiler
+
+with startup_profiler.track("streamlit"):
+    import streamlit as st
 import os
-from dotenv import load_dotenv
+import logging
+from concurrent.futures import ThreadPoolExecutor
+with startup_profiler.track("dotenv"):
+    from dotenv import load_dotenv
 
 # Charger les variables d'environnement au plus tôt
 load_dotenv()
 
-import speech_recognition as sr
-from gtts import gTTS
-import tempfile
-from src.rag_chain import query_rag
-from src.utils.metadata import get_all_metadata
-from src.utils.db_manager import (
-    load_all_chats, save_chat, create_new_session, 
-    delete_chat, delete_all_chats, sign_in, sign_up, sign_out,
-    get_supabase_client
-)
+# src.rag_chain (LangChain, Chroma, modèle d'embedding) est importé par le thread de préchauffage
+with startup_profiler.track("src.utils"):
+    from src.utils.metadata import get_corpus_stats
+    from src.utils.history_manager import fold_history, pending_turns
+    from src.utils.db_manager import (
+        load_all_chats, save_chat, create_new_session, 
+        delete_chat, delete_all_chats, sign_in, sign_up, sign_out,
+        is_supabase_configured, get_session_summary, save_session_summary
+    )
+from src.warmup import start_warmup
 import base64
 
+logger = logging.getLogger(__name__)
+
 # Configuration de la page
 st.set_page_config(
     page_title="Tèwou Agro-Assistant",
@@ -24,6 +32,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Chargement du modèle et de la base vectorielle en arrière-plan pendant la connexion
+start_warmup()
+
 # Chemins des fichiers
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOGO_PATH = os.path.join(BASE_DIR, "static", "logo.png")
@@ -183,7 +194,7 @@ def show_login_page():
     st.markdown('<div class="header-container"><div class="agro-orb">🌱</div><h1>Accès Tèwou Agro</h1><p style="font-size: 1.2rem; opacity: 0.8; margin-top: 1rem;">Connectez-vous pour accéder à votre assistant personnalisé</p></div>', unsafe_allow_html=True)
     
     # Outil de diagnostic (visible uniquement si config manquante)
-    if not get_supabase_client():
+    if not is_supabase_configured():
         with st.expander("🛠️ Diagnostic de connexion (Problème détecté)", expanded=True):
             st.error("L'application ne trouve pas vos clés de sécurité Supabase.")
             st.info("Vérifiez que vous avez bien ajouté `SUPABASE_URL` et `SUPABASE_KEY` dans les **Secrets** de Streamlit Cloud.")
@@ -234,8 +245,51 @@ def show_login_page():
 
 # --- GESTION DE SESSION ---
 
+@st.cache_resource
+def get_summary_executor():
+    """Threads partagés par toutes les sessions pour les mises à jour du résumé (appel au LLM)."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-summary")
+
+def _fold_and_save(session_id, history, summary, summarized_turns):
+    # Exécuté hors du script Streamlit : pas d'accès à st.session_state ici
+    from src.rag_chain import summarize_history
+    new_summary, new_turns = fold_history(history, summary, summarized_turns, summarize_history)
+    if new_turns != summarized_turns:
+        save_session_summary(session_id, new_summary, new_turns)
+    return new_summary, new_turns
+
+def get_history_summary(session_id):
+    """Résumé glissant de la session (résumé, nombre d'échanges couverts), mis en cache dans la session Streamlit."""
+    summaries = st.session_state.setdefault("history_summaries", {})
+    pending = st.session_state.setdefault("pending_summaries", {})
+    future = pending.get(session_id)
+    if future is not None and future.done():
+        del pending[session_id]
+        try:
+            summaries[session_id] = future.result()
+        except Exception as e:
+            logger.error(f"Erreur mise à jour du résumé: {e}")
+    if session_id not in summaries:
+        summaries[session_id] = get_session_summary(session_id)
+    return summaries[session_id]
+
+def update_history_summary(session_id, history):
+    """
+    Intègre au résumé les échanges sortis de la fenêtre récente, par lots (voir fold_history),
+    en arrière-plan : la réponse suivante utilise l'ancien résumé tant que le nouveau n'est pas prêt.
+    """
+    summary, summarized_turns = get_history_summary(session_id)
+    pending = st.session_state.setdefault("pending_summaries", {})
+    if session_id in pending:
+        # Une mise à jour est déjà en cours pour cette session
+        return
+    pending[session_id] = get_summary_executor().submit(
+        _fold_and_save, session_id, history, summary, summarized_turns
+    )
+
 if "user" not in st.session_state:
     show_login_page()
+    startup_profiler.mark_first_paint()
     st.stop()
 
 # Utilisateur actuel
@@ -324,9 +378,15 @@ with st.sidebar:
     
     st.markdown('<div class="sidebar-title" style="margin-top: 2rem;">📚 Bibliothèque Tèwou</div>', unsafe_allow_html=True)
     try:
-        metadata = get_all_metadata()
-        if metadata:
-            st.info(f"{len(metadata)} documents indexés")
+        # Statistiques précalculées par les scrapers et l'indexation (relues seulement si le fichier change)
+        corpus_stats = get_corpus_stats()
+        index_stats = corpus_stats.get("index") or {}
+        documents = index_stats.get("documents") or (corpus_stats.get("collection") or {}).get("documents")
+        if documents:
+            chunks = index_stats.get("chunks")
+            st.info(f"{documents} documents indexés" + (f" · {chunks} passages" if chunks else ""))
+            if index_stats.get("built_at"):
+                st.caption(f"Index mis à jour le {index_stats['built_at'].replace('T', ' à ')}")
     except:
         pass
 
@@ -344,6 +404,7 @@ Votre compagnon agricole intelligent pour le Sénégal
 </p>
 </div>
 """, unsafe_allow_html=True)
+startup_profiler.mark_first_paint()
 
 # Affichage des messages
 for message in st.session_state.messages:
@@ -365,6 +426,7 @@ if text_input:
     
     # Réponse Assistant
     history = [(m["content"], r["content"]) for m, r in zip(st.session_state.messages[::2], st.session_state.messages[1::2])]
+    history_summary, summarized_turns = get_history_summary(st.session_state.session_id)
     
     with st.chat_message("assistant", avatar=LOGO_PATH):
         message_placeholder = st.empty()
@@ -372,7 +434,12 @@ if text_input:
         
         with st.status("Analyse de votre demande...", expanded=True) as status:
             try:
-                stream = query_rag(text_input, soil_type=selected_soil, location=location, chat_history=history)
+                from src.rag_chain import query_rag
+                stream = query_rag(
+                    text_input, soil_type=selected_soil, location=location,
+                    chat_history=pending_turns(history, summarized_turns),
+                    history_summary=history_summary
+                )
                 
                 for event in stream:
                     if event["type"] == "status":
@@ -386,6 +453,7 @@ if text_input:
                 
                 st.session_state.messages.append({"role": "assistant", "content": full_response})
                 save_chat(st.session_state.session_id, st.session_state.messages, user_id=user.id)
+                update_history_summary(st.session_state.session_id, history + [(text_input, full_response)])
                 
             except Exception as e:
                 status.update(label="Erreur rencontrée", state="error")
@@ -0,0 +1,176 @@
+import gzip
+import json
+import math
+import os
+import re
+import logging
+import unicodedata
+from collections import Counter
+from langchain_core.documents import Document
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+# Frequent French/English words that carry no lexical signal
+STOPWORDS = frozenset("""
+a au aux avec ce ces dans de des du elle en et eux il je la le les leur lui ma mais me meme mes
+moi mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi ton tu un
+une vos votre vous c d j l m n s t y est sont ete etre quel quelle quels quelles
+the of and to in is for on that with as by an be are this it or at from
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[._\-][a-z0-9]+)*")
+
+
+def fold_accents(text):
+    """
+    Lowercases and strips diacritics ("Thiès" -> "thies", "éléments" -> "elements").
+    """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    """
+    Accent-folded tokens. Compound codes such as "NV.AGR.TOTL.ZS" or "2017-2018"
+    are kept whole and also split into their parts.
+    """
+    tokens = []
+    for match in _TOKEN_RE.findall(fold_accents(text)):
+        if match not in STOPWORDS:
+            tokens.append(match)
+        if not match.isalnum():
+            tokens.extend(p for p in re.split(r"[._\-]", match) if p and p not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """
+    In-memory BM25 inverted index over vector store chunks, keyed by chunk id.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs = {}       # chunk id -> (text, metadata)
+        self.lengths = {}    # chunk id -> number of tokens
+        self.postings = {}   # term -> {chunk id: term frequency}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, ids, chunks):
+        for chunk_id, chunk in zip(ids, chunks):
+            if chunk_id in self.docs:
+                continue
+            counts = Counter(tokenize(chunk.page_content))
+            self.docs[chunk_id] = (chunk.page_content, dict(chunk.metadata))
+            self.lengths[chunk_id] = sum(counts.values())
+            self._total_length += self.lengths[chunk_id]
+            for term, tf in counts.items():
+                self.postings.setdefault(term, {})[chunk_id] = tf
+
+    def remove(self, ids):
+        for chunk_id in ids:
+            entry = self.docs.pop(chunk_id, None)
+            if entry is None:
+                continue
+            self._total_length -= self.lengths.pop(chunk_id)
+            for term in set(tokenize(entry[0])):
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self.postings[term]
+
+    def search(self, query, k=10):
+        """
+        Returns up to k (chunk id, score) pairs, best first.
+        """
+        n = len(self.docs)
+        if n == 0:
+            return []
+        avg_len = self._total_length / n
+        scores = Counter()
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[chunk_id] / avg_len)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores.most_common(k)
+
+    def get_documents(self, ids):
+        return [Document(page_content=self.docs[i][0], metadata=self.docs[i][1]) for i in ids if i in self.docs]
+
+    def save(self, path):
+        """
+        Writes the index as gzipped JSON; postings refer to documents by position.
+        """
+        ids = list(self.docs)
+        position = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        data = {
+            "version": INDEX_FORMAT_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "ids": ids,
+            "docs": [[self.docs[i][0], self.docs[i][1], self.lengths[i]] for i in ids],
+            "postings": {
+                term: [x for chunk_id, tf in postings.items() for x in (position[chunk_id], tf)]
+                for term, postings in self.postings.items()
+            },
+        }
+        # Per-process temporary file: several workers may save a rebuilt index at once
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported BM25 index version: {data.get('version')}")
+        index = cls(k1=data["k1"], b=data["b"])
+        ids = data["ids"]
+        for chunk_id, (text, metadata, length) in zip(ids, data["docs"]):
+            index.docs[chunk_id] = (text, metadata)
+            index.lengths[chunk_id] = length
+            index._total_length += length
+        for term, flat in data["postings"].items():
+            index.postings[term] = {ids[flat[i]]: flat[i + 1] for i in range(0, len(flat), 2)}
+        return index
+
+    @classmethod
+    def from_collection(cls, collection):
+        """
+        Rebuilds the index from the documents stored in a Chroma collection.
+        """
+        index = cls()
+        data = collection.get(include=["documents", "metadatas"])
+        chunks = [
+            Document(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(data["documents"], data["metadatas"])
+        ]
+        index.add(data["ids"], chunks)
+        return index
+
+
+def reciprocal_rank_fusion(result_lists, k, rrf_k=60):
+    """
+    Fuses ranked lists of Documents (identified by their text) with RRF:
+    score(d) = sum over lists of 1 / (rrf_k + rank(d)).
+    """
+    scores = Counter()
+    by_text = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            scores[doc.page_content] += 1.0 / (rrf_k + rank)
+            by_text.setdefault(doc.page_content, doc)
+    return [by_text[text] for text, _ in scores.most_common(k)]
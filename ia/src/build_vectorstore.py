@@ -1,8 +1,27 @@
 import os
+import re
+import time
 import logging
+import argparse
+import threading
+from itertools import chain, tee
+from operator import itemgetter
+from datetime import datetime
+from collections import Counter
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from src.data_processing import load_documents, split_documents
+from src.data_processing import iter_documents, iter_chunks
+from src.bm25_index import BM25Index
+from src.dedup import NearDuplicateIndex, chunk_source, with_provenance
+from src.embedding_pipeline import embed_and_write, DEFAULT_BATCH_SIZE
+from src.embedding_backends import create_embeddings, backend_model_key
+from src.vector_index import (
+    VECTOR_INDEX_BACKEND, VECTOR_INDEX_DIR, export_vector_index, load_vector_index, vector_index_is_current
+)
+from src.utils.embedding_cache import EmbeddingCache, CachedEmbeddings
+from src.utils.metadata import update_corpus_stats
+from src.utils.index_manifest import (
+    document_key, document_hashes, chunk_ids, load_manifest, save_manifest
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -10,35 +29,325 @@ logger = logging.getLogger(__name__)
 # Config
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_DIR = os.path.join(BASE_DIR, "chroma_db")
+# Per-document content hashes of what is currently in DB_DIR
+MANIFEST_PATH = os.path.join(BASE_DIR, "index_manifest.json")
 # Model for multilingual support (French/Wolof/etc.)
 EMBEDDING_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+# Category-partitioned collections (one per metadata "category"), next to the full collection
+PARTITION_PREFIX = "tewou_"
+# Lexical (BM25) index over the same chunks, fused with dense results at query time
+BM25_INDEX_PATH = os.path.join(BASE_DIR, "bm25_index.json.gz")
+# Persistent (model, chunk hash) -> vector cache shared by builds and queries
+EMBEDDING_CACHE_PATH = os.path.join(BASE_DIR, "embedding_cache.sqlite3")
+EMBEDDING_CACHE_MAX_ENTRIES = 200_000
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+# Chunks whose estimated Jaccard similarity (5-word shingles) with an already kept
+# chunk reaches this threshold are not indexed (0 disables deduplication)
+DEDUP_THRESHOLD = 0.9
 
-def build_vectorstore():
+_embedding_cache = None
+
+def get_embedding_cache():
+    """
+    Returns the process-wide embedding cache, or None if it cannot be opened.
+    """
+    global _embedding_cache
+    if _embedding_cache is None:
+        try:
+            _embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES)
+        except Exception as e:
+            logger.warning(f"Embedding cache unavailable ({EMBEDDING_CACHE_PATH}): {e}")
+    return _embedding_cache
+
+def get_embeddings():
+    """
+    Returns the query-side embedding function, backed by the embedding cache.
+    """
+    embeddings = create_embeddings(EMBEDDING_MODEL_NAME)
+    cache = get_embedding_cache()
+    if cache is None:
+        return embeddings
+    return CachedEmbeddings(embeddings, cache, backend_model_key(EMBEDDING_MODEL_NAME))
+
+def get_index_version():
+    """
+    Returns a token that changes every time the vector store is rebuilt
+    (the manifest is rewritten at the end of each build).
+    """
+    try:
+        return os.stat(MANIFEST_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+def partition_name(category):
+    """
+    Chroma collection name of a category partition.
+    """
+    return PARTITION_PREFIX + re.sub(r"[^a-zA-Z0-9_-]", "_", category or "general")
+
+def list_partitions(client):
+    # chromadb < 0.6 returns names, later versions return Collection objects
+    names = [getattr(c, "name", c) for c in client.list_collections()]
+    return [name for name in names if name.startswith(PARTITION_PREFIX)]
+
+class PartitionWriter:
+    """
+    Mirrors written/deleted chunks into the collection of their category.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._collections = {}
+
+    def _collection(self, name):
+        if name not in self._collections:
+            self._collections[name] = self.client.get_or_create_collection(name)
+        return self._collections[name]
+
+    def __call__(self, chunks, ids, vectors):
+        groups = {}
+        for chunk, chunk_id, vector in zip(chunks, ids, vectors):
+            name = partition_name(chunk.metadata.get("category"))
+            groups.setdefault(name, []).append((chunk, chunk_id, vector))
+        for name, items in groups.items():
+            self._collection(name).upsert(
+                ids=[chunk_id for _, chunk_id, _ in items],
+                embeddings=[vector for _, _, vector in items],
+                documents=[chunk.page_content for chunk, _, _ in items],
+                metadatas=[chunk.metadata for chunk, _, _ in items]
+            )
+
+    def delete(self, ids):
+        for name in list_partitions(self.client):
+            self._collection(name).delete(ids=ids)
+
+    def reset(self):
+        for name in list_partitions(self.client):
+            self.client.delete_collection(name)
+        self._collections = {}
+
+def _load_bm25_index(vectorstore, incremental):
+    if incremental:
+        if os.path.exists(BM25_INDEX_PATH):
+            try:
+                return BM25Index.load(BM25_INDEX_PATH)
+            except Exception as e:
+                logger.warning(f"Could not load BM25 index ({e}), rebuilding it from the vector store.")
+        return BM25Index.from_collection(vectorstore._collection)
+    return BM25Index()
+
+def _iter_chunks():
+    return iter_chunks(iter_documents(), chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+
+def _find_duplicates(dedup_threshold):
+    """
+    First pass over the chunk stream: finds the chunks that nearly duplicate an
+    earlier kept chunk. Returns ({kept position: [sources of its duplicates]},
+    set of removed positions, statistics), positions being chunk stream indices.
+    """
+    index = NearDuplicateIndex(dedup_threshold)
+    absorbed, removed = {}, set()
+    removed_by_source = Counter()
+    total = 0
+    for position, chunk in enumerate(_iter_chunks()):
+        total += 1
+        original = index.add(position, chunk.page_content)
+        if original is not None:
+            source = chunk_source(chunk)
+            absorbed.setdefault(original, []).append(source)
+            removed.add(position)
+            removed_by_source[source] += 1
+    logger.info(
+        f"Deduplication: {len(removed)} near-duplicate chunk(s) removed out of "
+        f"{total} (threshold {dedup_threshold})."
+    )
+    for source, count in removed_by_source.most_common(5):
+        logger.info(f"  {count} duplicate chunk(s) from {source}")
+    stats = {"threshold": dedup_threshold, "chunks": total,
+             "kept": total - len(removed), "removed": len(removed)}
+    return absorbed, removed, stats
+
+def _new_manifest(dedup_threshold):
+    return {
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "partitioned": True,
+        "dedup_threshold": dedup_threshold,
+        "documents": {}
+    }
+
+def _manifest_matches(manifest, dedup_threshold):
+    return (
+        manifest is not None
+        and manifest.get("embedding_model") == EMBEDDING_MODEL_NAME
+        and manifest.get("chunk_size") == CHUNK_SIZE
+        and manifest.get("chunk_overlap") == CHUNK_OVERLAP
+        and manifest.get("partitioned") is True
+        and manifest.get("dedup_threshold") == dedup_threshold
+    )
+
+def _export_vector_index(vectorstore):
+    """
+    Exports the collection to the memory-mapped/HNSW index when one is selected.
+    """
+    if VECTOR_INDEX_BACKEND not in ("mmap", "hnsw"):
+        return
+    if vector_index_is_current(VECTOR_INDEX_DIR, get_index_version(), VECTOR_INDEX_BACKEND):
+        return
+    export_vector_index(
+        vectorstore._collection, VECTOR_INDEX_DIR,
+        hnsw=VECTOR_INDEX_BACKEND == "hnsw", index_version=get_index_version()
+    )
+
+def _write_index_stats(document_fields, chunks_by_category, dedup_stats, seconds, incremental):
+    """
+    Records what was indexed in the corpus statistics read by the app sidebar.
+    """
+    try:
+        update_corpus_stats("index", {
+            "documents": len(document_fields),
+            "documents_by_category": dict(Counter(c for c, _ in document_fields.values()).most_common()),
+            "documents_by_language": dict(Counter(l for _, l in document_fields.values()).most_common()),
+            "chunks": sum(chunks_by_category.values()),
+            "chunks_by_category": dict(chunks_by_category.most_common()),
+            "duplicates_removed": (dedup_stats or {}).get("removed", 0),
+            "embedding_model": EMBEDDING_MODEL_NAME,
+            "built_at": datetime.now().isoformat(timespec="seconds"),
+            "build_seconds": round(seconds, 1),
+            "incremental": incremental,
+            "index_version": get_index_version(),
+        })
+    except Exception as e:
+        logger.warning(f"Could not write corpus statistics: {e}")
+
+def build_vectorstore(incremental=False, workers=1, batch_size=DEFAULT_BATCH_SIZE,
+                      dedup_threshold=DEDUP_THRESHOLD):
     """
     Builds and persists a Chroma vector store.
+
+    With incremental=True, nothing is done if no document hash changed since the
+    last build (see MANIFEST_PATH). Otherwise the corpus is re-split and
+    deduplicated (near-duplicates are detected across documents, so this depends
+    on every document); only chunks with a new id are embedded and the chunks
+    that disappeared are deleted.
+
+    Documents are streamed from disk in three passes (hashing, near-duplicate
+    detection, splitting + embedding), so memory does not grow with the text of
+    the corpus: it is bounded by the largest document, the batches in flight and
+    per-chunk bookkeeping (ids, MinHash signatures) plus the BM25 index itself.
+
+    Chunks are embedded in batches of batch_size, across `workers` processes.
     """
     logger.info("Starting to build vector store...")
+    start = time.perf_counter()
     
-    # Load and split documents
-    documents = load_documents()
-    if not documents:
+    # First pass: content hash of every document (one document in memory at a time)
+    hashes = document_hashes(iter_documents())
+    if not hashes:
         logger.error("No documents found to index.")
         return
-        
-    chunks = split_documents(documents)
+    logger.info(f"Loaded {len(hashes)} document(s).")
     
-    # Initialize embeddings
-    logger.info(f"Initializing embedding model: {EMBEDDING_MODEL_NAME}")
-    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+    # Initialize embeddings (worker processes load their own copy)
+    embeddings = None
+    if workers <= 1:
+        logger.info(f"Initializing embedding model: {EMBEDDING_MODEL_NAME}")
+        embeddings = create_embeddings(EMBEDDING_MODEL_NAME)
     
-    # Create and persist Chroma DB
-    logger.info(f"Creating vector store in {DB_DIR}...")
-    vectorstore = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        persist_directory=DB_DIR
-    )
+    manifest = load_manifest(MANIFEST_PATH) if incremental else None
+    if incremental and not _manifest_matches(manifest, dedup_threshold):
+        logger.warning("No compatible index manifest found, falling back to a full rebuild.")
+        incremental = False
+    
+    vectorstore = Chroma(persist_directory=DB_DIR, embedding_function=embeddings)
+    if incremental:
+        previous = manifest["documents"]
+    else:
+        # Start from an empty collection so a full build never duplicates chunks
+        vectorstore.delete_collection()
+        vectorstore = Chroma(persist_directory=DB_DIR, embedding_function=embeddings)
+        previous = {}
+    partitions = PartitionWriter(vectorstore._client)
+    if not incremental:
+        partitions.reset()
     
+    changed = [key for key in hashes if previous.get(key, {}).get("hash") != hashes[key]]
+    removed_docs = [key for key in previous if key not in hashes]
+    logger.info(f"{len(hashes)} document(s): {len(changed)} new/changed, {len(removed_docs)} removed.")
+    
+    bm25 = _load_bm25_index(vectorstore, incremental)
+    if incremental and not changed and not removed_docs and os.path.exists(BM25_INDEX_PATH):
+        # Nothing changed: keep the index version (and query caches) as they are
+        logger.info("Vector store already up to date.")
+        _export_vector_index(vectorstore)
+        return vectorstore
+    
+    # Second pass: near-duplicate detection over the whole chunk stream
+    new_manifest = _new_manifest(dedup_threshold)
+    absorbed, duplicates = {}, set()
+    if dedup_threshold > 0:
+        absorbed, duplicates, new_manifest["dedup"] = _find_duplicates(dedup_threshold)
+    
+    # Third pass: chunks are re-split and streamed to the embedder; only chunks
+    # whose id is not already indexed are embedded
+    old_ids = {chunk_id for entry in previous.values() for chunk_id in entry.get("chunk_ids", [])}
+    new_ids = set()
+    documents_manifest = new_manifest["documents"]
+    for key, digest in hashes.items():
+        documents_manifest[key] = {"hash": digest, "chunk_ids": []}
+    seen = {}
+    chunks_by_category = Counter()
+    document_fields = {}
+    
+    def new_chunks():
+        for position, chunk in enumerate(_iter_chunks()):
+            if position in duplicates:
+                continue
+            if position in absorbed:
+                chunk = with_provenance(chunk, len(absorbed[position]), absorbed[position])
+            key = document_key(chunk)
+            chunks_by_category[chunk.metadata.get("category") or "general"] += 1
+            document_fields.setdefault(key, (chunk.metadata.get("category") or "general",
+                                             chunk.metadata.get("language") or "unknown"))
+            chunk_id = chunk_ids(key, [chunk], seen.setdefault(key, {}))[0]
+            # A document modified during the build gets no hash and is re-indexed next time
+            documents_manifest.setdefault(key, {"hash": None, "chunk_ids": []})["chunk_ids"].append(chunk_id)
+            new_ids.add(chunk_id)
+            if chunk_id not in old_ids:
+                yield chunk, chunk_id
+    
+    to_add = new_chunks()
+    first = next(to_add, None)
+    if first is not None:
+        logger.info(f"Writing vector store in {DB_DIR}...")
+        chunk_stream, id_stream = tee(chain([first], to_add))
+        stats = embed_and_write(
+            vectorstore, map(itemgetter(0), chunk_stream), map(itemgetter(1), id_stream),
+            EMBEDDING_MODEL_NAME, embeddings=embeddings, batch_size=batch_size, workers=workers,
+            cache=get_embedding_cache(),
+            extra_writers=[partitions, lambda chunks, ids, vectors: bm25.add(ids, chunks)]
+        )
+        logger.info(
+            f"Embedded {stats['chunks']} chunk(s) in {stats['seconds']:.1f}s "
+            f"({stats['chunks_per_sec']:.1f} chunks/s)."
+        )
+    
+    to_delete = list(old_ids - new_ids)
+    logger.info(f"{len(to_delete)} chunk(s) to delete.")
+    if to_delete:
+        vectorstore.delete(ids=to_delete)
+        partitions.delete(to_delete)
+        bm25.remove(to_delete)
+    
+    bm25.save(BM25_INDEX_PATH)
+    logger.info(f"BM25 index saved to {BM25_INDEX_PATH} ({len(bm25)} chunk(s), {len(bm25.postings)} term(s)).")
+    
+    save_manifest(MANIFEST_PATH, new_manifest)
+    _export_vector_index(vectorstore)
+    _write_index_stats(document_fields, chunks_by_category, new_manifest.get("dedup"),
+                       time.perf_counter() - start, incremental)
     logger.info("Vector store built and persisted successfully.")
     return vectorstore
 
@@ -49,15 +358,92 @@ except ImportError:
     from functools import lru_cache
     cache_decorator = lru_cache(maxsize=1)
 
+_bm25_index = None
+_bm25_mtime = None
+_bm25_lock = threading.Lock()
+_bm25_rebuild_failed = False
+
+def _rebuild_missing_bm25_index():
+    """
+    Rebuilds the BM25 index from the Chroma collection when its file is missing
+    (a checkout where chroma_db is committed but the BM25 index is not), and saves it.
+    """
+    global _bm25_index, _bm25_mtime, _bm25_rebuild_failed
+    with _bm25_lock:
+        if _bm25_index is not None or _bm25_rebuild_failed:
+            return _bm25_index
+        logger.warning(f"Index BM25 absent ({BM25_INDEX_PATH}) : reconstruction depuis {DB_DIR}.")
+        try:
+            index = BM25Index.from_collection(Chroma(persist_directory=DB_DIR)._collection)
+        except Exception as e:
+            _bm25_rebuild_failed = True
+            logger.error(f"Reconstruction de l'index BM25 impossible, recherche dense seule: {e}")
+            return None
+        try:
+            index.save(BM25_INDEX_PATH)
+            _bm25_mtime = os.stat(BM25_INDEX_PATH).st_mtime_ns
+        except OSError as e:
+            logger.warning(f"Index BM25 reconstruit mais non enregistré: {e}")
+        _bm25_index = index
+        return index
+
+def get_bm25_index():
+    """
+    Loads the BM25 index saved next to the vector store, reloading it when a build
+    rewrites it, or rebuilding it from the vector store if the file is missing.
+    """
+    global _bm25_index, _bm25_mtime
+    try:
+        mtime = os.stat(BM25_INDEX_PATH).st_mtime_ns
+    except OSError:
+        if _bm25_index is None and os.path.exists(DB_DIR):
+            return _rebuild_missing_bm25_index()
+        return _bm25_index
+    if mtime != _bm25_mtime:
+        try:
+            _bm25_index = BM25Index.load(BM25_INDEX_PATH)
+            _bm25_mtime = mtime
+            logger.info(f"Index BM25 chargé ({len(_bm25_index)} passages).")
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement de l'index BM25: {e}")
+            return None
+    return _bm25_index
+
 @cache_decorator
 def get_vectorstore():
     """
     Loads the existing vector store. Cached to prevent reloading.
     """
+    try:
+        embeddings = get_embeddings()
+    except Exception as e:
+        logger.error(f"Erreur lors du chargement du modèle d'embedding: {e}")
+        return None
+    return _load_vectorstore(embeddings)
+
+def reopen_vectorstore(vectorstore):
+    """
+    Reopens the vector store after a rebuild, keeping its loaded embedding function:
+    a full build recreates the Chroma collection, so existing handles point to a
+    deleted collection.
+    """
+    return _load_vectorstore(vectorstore.embeddings)
+
+def clear_vectorstore_cache():
+    """
+    Drops the store cached by get_vectorstore(), which is reloaded on next call.
+    """
+    (getattr(get_vectorstore, "clear", None) or get_vectorstore.cache_clear)()
+
+def _load_vectorstore(embeddings):
     logger.info(f"Recherche de la base vectorielle à: {DB_DIR}")
     
     try:
-        embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+        if VECTOR_INDEX_BACKEND in ("mmap", "hnsw"):
+            store = load_vector_index(VECTOR_INDEX_BACKEND, embeddings, VECTOR_INDEX_DIR, get_index_version())
+            if store is not None:
+                return store
+            logger.warning(f"Index {VECTOR_INDEX_BACKEND} indisponible, utilisation de Chroma.")
         if os.path.exists(DB_DIR):
             logger.info("Base vectorielle trouvée sur le disque. Chargement...")
             # Vérifier que c'est bien une base Chroma (contient index ou sqlite)
@@ -76,4 +462,16 @@ def get_vectorstore():
         return None
 
 if __name__ == "__main__":
-    build_vectorstore()
+    parser = argparse.ArgumentParser(description="Build the Tèwou vector store")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only embed new/changed documents and drop removed ones")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Embedding processes (0 = one per CPU core)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Chunks embedded and written per batch")
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD,
+                        help="Near-duplicate chunk similarity threshold (0 = keep every chunk)")
+    args = parser.parse_args()
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    build_vectorstore(incremental=args.incremental, workers=workers, batch_size=args.batch_size,
+                      dedup_threshold=args.dedup_threshold)
@@ -3,37 +3,77 @@ import json
 import logging
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from src.utils.categories import classify_text, UNSPECIFIED_CATEGORIES
+from src.utils.metadata import iter_metadata
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def load_documents(data_dir="../../web_scrapping/data_collection"):
+# Metadata fields copied onto every chunk, so they can be filtered/routed on
+INDEXED_FIELDS = ("title", "category", "language", "region")
+
+def load_metadata_index(data_dir):
     """
-    Loads documents from extracted_text (txt) and web_content (json).
+    Maps each collected file (e.g. "extracted_text/x.pdf.txt") to its metadata record.
+    """
+    index = {}
+    try:
+        for entry in iter_metadata(data_dir):
+            content = entry.get("content", "")
+            if isinstance(content, str) and content.startswith("extracted_text/"):
+                index[content] = entry.get("metadata", {})
+    except Exception as e:
+        logger.error(f"Error loading the metadata of {data_dir}: {e}")
+    return index
+
+def enrich_metadata(metadata, text, title=""):
+    """
+    Normalizes the indexed fields; generic categories are refined from the content.
+    """
+    enriched = dict(metadata)
+    for field in INDEXED_FIELDS:
+        enriched[field] = str(enriched.get(field) or "").strip()
+    if enriched["category"] in UNSPECIFIED_CATEGORIES:
+        enriched["category"] = classify_text(enriched["title"] or title, text)
+    enriched["language"] = enriched["language"] or "unknown"
+    enriched["region"] = enriched["region"] or "Sénégal"
+    return enriched
+
+def iter_documents(data_dir="../../web_scrapping/data_collection"):
     """
-    documents = []
+    Yields documents from extracted_text (txt) and web_content (json) one file at
+    a time, in a stable (sorted) order, so only one document is held in memory.
+    Every document carries title/category/language/region metadata.
+    """
+    metadata_index = load_metadata_index(data_dir)
     
     # Load TXT files from extracted_text
     txt_dir = os.path.join(data_dir, "extracted_text")
     if os.path.exists(txt_dir):
-        for filename in os.listdir(txt_dir):
+        for filename in sorted(os.listdir(txt_dir)):
             if filename.endswith(".txt"):
                 file_path = os.path.join(txt_dir, filename)
                 try:
                     with open(file_path, "r", encoding="utf-8") as f:
                         text = f.read()
                         if text.strip():
-                            documents.append(Document(
+                            metadata = enrich_metadata(
+                                metadata_index.get(f"extracted_text/{filename}", {}),
+                                text, title=filename
+                            )
+                            metadata["source"] = filename
+                            metadata["type"] = "txt"
+                            yield Document(
                                 page_content=text,
-                                metadata={"source": filename, "type": "txt"}
-                            ))
+                                metadata=metadata
+                            )
                 except Exception as e:
                     logger.error(f"Error loading {file_path}: {e}")
 
     # Load JSON files from web_content
     web_dir = os.path.join(data_dir, "web_content")
     if os.path.exists(web_dir):
-        for filename in os.listdir(web_dir):
+        for filename in sorted(os.listdir(web_dir)):
             if filename.endswith(".json"):
                 file_path = os.path.join(web_dir, filename)
                 try:
@@ -41,29 +81,45 @@ def load_documents(data_dir="../../web_scrapping/data_collection"):
                         data = json.load(f)
                         content = data.get("content", "")
                         if content.strip():
-                            metadata = data.get("metadata", {})
+                            metadata = enrich_metadata(data.get("metadata", {}), content, title=filename)
                             metadata["source"] = data.get("source_url", filename)
                             metadata["type"] = "json"
-                            documents.append(Document(
+                            yield Document(
                                 page_content=content,
                                 metadata=metadata
-                            ))
+                            )
                 except Exception as e:
                     logger.error(f"Error loading {file_path}: {e}")
-                    
-    logger.info(f"Loaded {len(documents)} document(s).")
-    return documents
 
-def split_documents(documents, chunk_size=1000, chunk_overlap=100):
+def load_documents(data_dir="../../web_scrapping/data_collection"):
     """
-    Splits documents into smaller chunks for the vector store.
+    Loads every document in memory (see iter_documents).
     """
-    text_splitter = RecursiveCharacterTextSplitter(
+    documents = list(iter_documents(data_dir))
+    logger.info(f"Loaded {len(documents)} document(s).")
+    return documents
+
+def _text_splitter(chunk_size, chunk_overlap):
+    return RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
         separators=["\n\n", "\n", " ", ""]
     )
-    chunks = text_splitter.split_documents(documents)
+
+def iter_chunks(documents, chunk_size=1000, chunk_overlap=100):
+    """
+    Splits documents from any iterable lazily, yielding the chunks of one
+    document before the next document is read.
+    """
+    text_splitter = _text_splitter(chunk_size, chunk_overlap)
+    for doc in documents:
+        yield from text_splitter.split_documents([doc])
+
+def split_documents(documents, chunk_size=1000, chunk_overlap=100):
+    """
+    Splits documents into smaller chunks for the vector store.
+    """
+    chunks = _text_splitter(chunk_size, chunk_overlap).split_documents(documents)
     logger.info(f"Created {len(chunks)} chunk(s).")
     return chunks
 
@@ -0,0 +1,120 @@
+import re
+import zlib
+import logging
+import numpy as np
+from langchain_core.documents import Document
+from src.bm25_index import fold_accents
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Near-duplicate chunk detection: MinHash signatures of word shingles, candidate
+# pairs from LSH banding, then a Jaccard estimate checked against the threshold.
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+SEED = 1
+
+_WORD_RE = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """
+    Accent-folded word n-grams of a text.
+    """
+    words = _WORD_RE.findall(fold_accents(text))
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """
+    MinHash signatures with num_perm universal hash functions (a * x + b mod p).
+    """
+
+    def __init__(self, num_perm=NUM_PERM, seed=SEED):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set):
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingle_set), dtype=np.uint64, count=len(shingle_set)
+        )
+        permuted = ((np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME) & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+def lsh_params(threshold, num_perm=NUM_PERM):
+    """
+    (bands, rows) minimizing the false positive + false negative area around the
+    threshold of the LSH S-curve 1 - (1 - s^rows)^bands.
+    """
+    similarities = np.linspace(0, 1, 201)
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        probability = 1 - (1 - similarities ** rows) ** bands
+        below = similarities < threshold
+        error = probability[below].sum() + (1 - probability[~below]).sum()
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+def chunk_source(chunk):
+    return chunk.metadata.get("source") or chunk.metadata.get("title") or "inconnu"
+
+
+def with_provenance(chunk, duplicate_count, duplicate_sources):
+    """
+    Copy of a kept chunk recording how many copies it absorbed and their other sources.
+    """
+    sources = sorted(set(duplicate_sources) - {chunk_source(chunk)})
+    return Document(
+        page_content=chunk.page_content,
+        metadata={**chunk.metadata, "duplicate_count": duplicate_count,
+                  "duplicate_sources": " | ".join(sources)}
+    )
+
+
+class NearDuplicateIndex:
+    """
+    Incremental MinHash/LSH index over kept texts. A text is compared with kept
+    texts only, so duplicates never chain into dissimilar ones. Only signatures
+    and band hashes are stored (no text), so texts can be streamed through it.
+    """
+
+    def __init__(self, threshold, num_perm=NUM_PERM):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self.buckets = [{} for _ in range(self.bands)]
+        self.signatures = {}
+
+    def add(self, key, text):
+        """
+        Returns the key of the kept text that `text` nearly duplicates, or None
+        after recording `text` as kept under `key`.
+        """
+        signature = self.hasher.signature(shingles(text)).astype(np.uint32)
+        rows = self.rows
+        band_hashes = [hash(signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+        candidates = set()
+        for band, band_hash in enumerate(band_hashes):
+            candidates.update(self.buckets[band].get(band_hash, ()))
+        best, best_similarity = None, self.threshold
+        for candidate in sorted(candidates):
+            similarity = float(np.mean(self.signatures[candidate] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        if best is not None:
+            return best
+        self.signatures[key] = signature
+        for band, band_hash in enumerate(band_hashes):
+            self.buckets[band].setdefault(band_hash, []).append(key)
+        return None
+
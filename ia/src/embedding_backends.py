@@ -0,0 +1,313 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import subprocess
+from langchain_core.embeddings import Embeddings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Embedding runtime: "torch" (sentence-transformers) or "onnx" (int8-quantized
+# ONNX Runtime export of the same model, no torch needed at query time)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ONNX_MODELS_DIR = os.path.join(BASE_DIR, "models")
+ONNX_MODEL_FILE = "model_int8.onnx"
+ONNX_INFO_FILE = "export_info.json"
+ONNX_BATCH_SIZE = 32
+# Minimum cosine between torch and ONNX vectors of the same text for the export to be accepted
+PARITY_THRESHOLD = 0.98
+PARITY_SAMPLE_SIZE = 200
+DATA_DIR = os.path.join(BASE_DIR, "..", "web_scrapping", "data_collection")
+
+BENCHMARK_QUERIES = [
+    "Quand semer le mil dans la région de Kaolack ?",
+    "Quelle est la pluviométrie moyenne à Tambacounda ?",
+    "Comment lutter contre la salinisation des sols dans le delta du Saloum ?",
+    "Production d'arachide au Sénégal en 2016",
+    "Quel engrais utiliser sur un sol dior ?",
+    "Date de début de l'hivernage à Ziguinchor",
+    "Rendement du riz irrigué dans la vallée du fleuve Sénégal",
+    "Comment faire du compost pour mon champ ?",
+]
+
+
+def onnx_model_dir(model_name):
+    """
+    Directory holding the ONNX export of a model.
+    """
+    return os.path.join(ONNX_MODELS_DIR, model_name.replace("/", "__") + "-onnx-int8")
+
+
+def resolve_backend(model_name, backend=None):
+    """
+    Returns the backend actually usable for model_name: "onnx" falls back to
+    "torch" (with a warning) when the model has not been exported yet.
+    """
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    if backend == "onnx" and not os.path.exists(os.path.join(onnx_model_dir(model_name), ONNX_MODEL_FILE)):
+        logger.warning(
+            f"No ONNX export found for {model_name}, using torch. "
+            f"Run: python -m src.embedding_backends export"
+        )
+        return "torch"
+    return backend
+
+
+def backend_model_key(model_name, backend=None):
+    """
+    Model identifier used for embedding cache keys, so that torch and int8
+    vectors of the same text are never mixed up in the cache.
+    """
+    if resolve_backend(model_name, backend) == "onnx":
+        return f"{model_name}#onnx-int8"
+    return model_name
+
+
+def create_embeddings(model_name, backend=None, threads=None):
+    """
+    Returns a LangChain Embeddings instance for model_name on the selected backend.
+    """
+    if resolve_backend(model_name, backend) == "onnx":
+        return OnnxEmbeddings(onnx_model_dir(model_name), threads=threads)
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Mean-pooled sentence embeddings from an int8 ONNX export, matching
+    sentence-transformers' output for the same model.
+    """
+
+    def __init__(self, model_dir, threads=None, batch_size=ONNX_BATCH_SIZE):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, ONNX_INFO_FILE), "r", encoding="utf-8") as f:
+            self.info = json.load(f)
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(self.info["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.info["pad_token_id"], pad_token=self.info["pad_token"])
+        self.batch_size = batch_size
+
+    def _embed(self, texts):
+        import numpy as np
+
+        # Same preprocessing as HuggingFaceEmbeddings
+        encodings = self.tokenizer.encode_batch([t.replace("\n", " ") for t in texts])
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        hidden = self.session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def embed_documents(self, texts):
+        # Batches of similar length keep padding (and wasted compute) low
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._embed([texts[i] for i in batch])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text):
+        return self._embed([text])[0].tolist()
+
+
+def _cosines(a, b):
+    import numpy as np
+
+    a, b = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1) + 1e-12)
+
+
+def sample_texts(size=PARITY_SAMPLE_SIZE):
+    """
+    Corpus chunks spread over all documents, plus typical questions.
+    """
+    from src.data_processing import load_documents, split_documents
+
+    chunks = split_documents(load_documents(DATA_DIR)) if os.path.exists(DATA_DIR) else []
+    step = max(1, len(chunks) // size)
+    return [c.page_content for c in chunks[::step][:size]] + BENCHMARK_QUERIES
+
+
+def check_parity(model_name, texts, threshold=PARITY_THRESHOLD):
+    """
+    Compares ONNX vectors with the PyTorch ones for the same texts.
+    Returns cosine statistics and whether every text is above threshold.
+    """
+    reference = create_embeddings(model_name, backend="torch").embed_documents(texts)
+    candidate = OnnxEmbeddings(onnx_model_dir(model_name)).embed_documents(texts)
+    cosines = _cosines(reference, candidate)
+    return {
+        "texts": len(texts),
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "threshold": threshold,
+        "passed": bool(cosines.min() >= threshold),
+    }
+
+
+def export_onnx(model_name, threshold=PARITY_THRESHOLD):
+    """
+    One-time conversion: exports the sentence-transformers model to ONNX,
+    quantizes its weights to int8 (dynamic quantization) and checks parity
+    with the PyTorch vectors. Returns the export directory, or None on failure.
+    """
+    import torch
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = onnx_model_dir(model_name)
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, "model_fp32.onnx")
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    pooling = st_model[1].get_config_dict()
+    if not pooling.get("pooling_mode_mean_tokens") or len(st_model) > 2:
+        logger.error(f"Unsupported pipeline for {model_name}: only mean pooling without normalization is handled.")
+        return None
+
+    tokenizer = transformer.tokenizer
+    sample = tokenizer(["Exemple de phrase pour l'export."], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    logger.info(f"Exporting {model_name} to ONNX...")
+    model = transformer.auto_model.eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            model, ({name: sample[name] for name in input_names},), fp32_path,
+            input_names=input_names, output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes, opset_version=14
+        )
+    logger.info("Quantizing weights to int8...")
+    quantize_dynamic(fp32_path, os.path.join(output_dir, ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    tokenizer.save_pretrained(output_dir)
+
+    info = {
+        "model_name": model_name,
+        "max_seq_length": st_model.max_seq_length,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "input_names": input_names,
+    }
+    with open(os.path.join(output_dir, ONNX_INFO_FILE), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+
+    parity = check_parity(model_name, sample_texts(), threshold)
+    info["parity"] = parity
+    with open(os.path.join(output_dir, ONNX_INFO_FILE), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    logger.info(
+        f"Parity on {parity['texts']} text(s): min cosine {parity['min_cosine']:.4f}, "
+        f"mean {parity['mean_cosine']:.4f} (threshold {threshold})."
+    )
+    if not parity["passed"]:
+        logger.error("ONNX export rejected: vectors differ too much from PyTorch.")
+        os.remove(os.path.join(output_dir, ONNX_MODEL_FILE))
+        return None
+    logger.info(f"ONNX model written to {output_dir}")
+    return output_dir
+
+
+def _rss_mb():
+    """
+    Resident memory of the current process in MB.
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def benchmark(model_name, backend, runs=100):
+    """
+    Load time, per-query latency and resident memory of one backend, in this process.
+    """
+    rss_before = _rss_mb()
+    t0 = time.perf_counter()
+    embeddings = create_embeddings(model_name, backend=backend)
+    embeddings.embed_query("préchauffage")
+    load_s = time.perf_counter() - t0
+    latencies = []
+    for i in range(runs):
+        query = BENCHMARK_QUERIES[i % len(BENCHMARK_QUERIES)]
+        t0 = time.perf_counter()
+        embeddings.embed_query(query)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    latencies.sort()
+    return {
+        "backend": resolve_backend(model_name, backend),
+        "load_s": round(load_s, 2),
+        "p50_ms": round(latencies[len(latencies) // 2], 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "rss_mb": round(_rss_mb(), 1),
+        "model_rss_mb": round(_rss_mb() - rss_before, 1),
+    }
+
+
+def _benchmark_in_subprocess(model_name, backend, runs):
+    # One fresh interpreter per backend: resident memory is not shared between them
+    proc = subprocess.run(
+        [sys.executable, "-m", "src.embedding_backends", "bench-one",
+         "--backend", backend, "--runs", str(runs), "--model", model_name],
+        cwd=BASE_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        logger.error(f"Benchmark of {backend} failed: {proc.stderr.strip()[-500:]}")
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    from src.build_vectorstore import EMBEDDING_MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="ONNX int8 embedding backend tools")
+    parser.add_argument("command", choices=["export", "parity", "bench", "bench-one"])
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--threshold", type=float, default=PARITY_THRESHOLD,
+                        help="Minimum torch/ONNX cosine per text")
+    parser.add_argument("--backend", default=EMBEDDING_BACKEND, help="Backend for bench-one")
+    parser.add_argument("--runs", type=int, default=100, help="Queries per backend for bench")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        sys.exit(0 if export_onnx(args.model, args.threshold) else 1)
+    elif args.command == "parity":
+        result = check_parity(args.model, sample_texts(), args.threshold)
+        print(json.dumps(result, indent=2))
+        sys.exit(0 if result["passed"] else 1)
+    elif args.command == "bench-one":
+        print(json.dumps(benchmark(args.model, args.backend, args.runs)))
+    else:
+        print(f"{'backend':<8} {'load (s)':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'RSS (MB)':>9} {'model (MB)':>11}")
+        for backend in ("torch", "onnx"):
+            r = _benchmark_in_subprocess(args.model, backend, args.runs)
+            if r:
+                print(f"{r['backend']:<8} {r['load_s']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+                      f"{r['rss_mb']:>9} {r['model_rss_mb']:>11}")
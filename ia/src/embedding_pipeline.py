@@ -0,0 +1,153 @@
+import os
+import time
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from src.embedding_backends import create_embeddings, resolve_backend, backend_model_key
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 64
+
+# One model copy per worker process, loaded by _init_worker
+_worker_embeddings = None
+
+def _init_worker(model_name, threads, backend):
+    global _worker_embeddings
+    from src.embedding_backends import create_embeddings
+    if backend == "torch":
+        try:
+            import torch
+            # Avoid N workers x N torch threads oversubscribing the CPU
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+    _worker_embeddings = create_embeddings(model_name, backend=backend, threads=threads)
+
+def _embed_batch(texts):
+    return _worker_embeddings.embed_documents(texts)
+
+def iter_batches(chunks, ids, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Groups (chunk, id) pairs from any iterable into lists of at most batch_size.
+    """
+    batch_chunks, batch_ids = [], []
+    for chunk, chunk_id in zip(chunks, ids):
+        batch_chunks.append(chunk)
+        batch_ids.append(chunk_id)
+        if len(batch_chunks) >= batch_size:
+            yield batch_chunks, batch_ids
+            batch_chunks, batch_ids = [], []
+    if batch_chunks:
+        yield batch_chunks, batch_ids
+
+def write_batch(vectorstore, chunks, ids, vectors):
+    """
+    Writes pre-computed embeddings to the Chroma collection.
+    """
+    vectorstore._collection.upsert(
+        ids=ids,
+        embeddings=vectors,
+        documents=[chunk.page_content for chunk in chunks],
+        metadatas=[chunk.metadata for chunk in chunks]
+    )
+
+class _Progress:
+    def __init__(self, total=None):
+        self.total = total
+        self.done = 0
+        self.start = time.perf_counter()
+
+    def update(self, n):
+        self.done += n
+        elapsed = time.perf_counter() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        total = f"/{self.total}" if self.total is not None else ""
+        logger.info(f"Embedded {self.done}{total} chunk(s) ({rate:.1f} chunks/s)")
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        return {"chunks": self.done, "seconds": elapsed, "chunks_per_sec": rate}
+
+def _lookup(cache, model_name, texts):
+    """
+    Returns (vectors, missing_indices); vectors holds None where the cache missed.
+    """
+    if cache is None:
+        return [None] * len(texts), list(range(len(texts)))
+    vectors = cache.get_many(model_name, texts)
+    return vectors, [i for i, v in enumerate(vectors) if v is None]
+
+def _fill(cache, model_name, texts, vectors, missing, computed):
+    for i, vector in zip(missing, computed):
+        vectors[i] = vector
+    if cache is not None and missing:
+        cache.put_many(model_name, [texts[i] for i in missing], computed)
+    return vectors
+
+def embed_and_write(vectorstore, chunks, ids, model_name, embeddings=None,
+                    batch_size=DEFAULT_BATCH_SIZE, workers=1, total=None, cache=None,
+                    extra_writers=()):
+    """
+    Streams chunks through the embedding model in batches and writes each batch
+    to the vector store as soon as it is embedded.
+
+    With workers > 1, batches are embedded by a process pool (one model copy per
+    worker); at most 2 batches per worker are in flight, so memory stays bounded
+    whatever the number of chunks. With workers == 1, `embeddings` is used in-process.
+    When an EmbeddingCache is given, only cache misses are sent to the model
+    (entries are keyed by model and backend, see backend_model_key).
+    Each extra writer is called as writer(chunks, ids, vectors) after the main write.
+    Returns throughput statistics.
+    """
+    progress = _Progress(total)
+    backend = resolve_backend(model_name)
+    cache_key = backend_model_key(model_name, backend)
+
+    def write(batch_chunks, batch_ids, vectors):
+        write_batch(vectorstore, batch_chunks, batch_ids, vectors)
+        for writer in extra_writers:
+            writer(batch_chunks, batch_ids, vectors)
+
+    batches = iter_batches(chunks, ids, batch_size)
+
+    if workers <= 1:
+        if embeddings is None:
+            embeddings = create_embeddings(model_name, backend=backend)
+        for batch_chunks, batch_ids in batches:
+            texts = [c.page_content for c in batch_chunks]
+            vectors, missing = _lookup(cache, cache_key, texts)
+            if missing:
+                computed = embeddings.embed_documents([texts[i] for i in missing])
+                _fill(cache, cache_key, texts, vectors, missing, computed)
+            write(batch_chunks, batch_ids, vectors)
+            progress.update(len(batch_ids))
+        return progress.summary()
+
+    def flush(entry):
+        done_chunks, done_ids, texts, vectors, missing, future = entry
+        if future is not None:
+            _fill(cache, cache_key, texts, vectors, missing, future.result())
+        write(done_chunks, done_ids, vectors)
+        progress.update(len(done_ids))
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    logger.info(f"Starting {workers} {backend} embedding worker(s) ({threads} thread(s) each)...")
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker,
+                             initargs=(model_name, threads, backend)) as pool:
+        pending = deque()
+        for batch_chunks, batch_ids in batches:
+            texts = [c.page_content for c in batch_chunks]
+            vectors, missing = _lookup(cache, cache_key, texts)
+            future = pool.submit(_embed_batch, [texts[i] for i in missing]) if missing else None
+            pending.append((batch_chunks, batch_ids, texts, vectors, missing, future))
+            if len(pending) >= workers * 2:
+                flush(pending.popleft())
+        while pending:
+            flush(pending.popleft())
+    return progress.summary()
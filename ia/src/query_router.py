@@ -0,0 +1,21 @@
+import logging
+from src.utils.categories import CATEGORY_KEYWORDS, category_scores
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Au-delà de ce nombre de catégories détectées, la question est trop générale pour être routée
+MAX_ROUTED_CATEGORIES = 2
+
+
+def route_question(question):
+    """
+    Détermine les partitions (catégories) à interroger pour une question, par mots-clés.
+    Retourne une liste de catégories, ou None pour chercher dans toute la base.
+    """
+    scores = category_scores(question)
+    matched = sorted((c for c in scores if scores[c] > 0), key=scores.get, reverse=True)
+    if not matched or len(matched) > MAX_ROUTED_CATEGORIES or len(matched) == len(CATEGORY_KEYWORDS):
+        return None
+    logger.info(f"Question routée vers : {', '.join(matched)}")
+    return matched
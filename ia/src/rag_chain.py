@@ -1,11 +1,28 @@
 import os
+import re
+import asyncio
 import logging
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from langchain_cohere import ChatCohere
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
-from src.build_vectorstore import get_vectorstore
+from langchain_community.vectorstores import Chroma
+from src.build_vectorstore import (
+    BASE_DIR, get_vectorstore, reopen_vectorstore, clear_vectorstore_cache,
+    get_index_version, get_bm25_index, partition_name
+)
+from src.query_router import route_question
+from src.vector_index import MmapVectorStore
+from src.bm25_index import reciprocal_rank_fusion
+from src.reranker import rerank
+from src.utils.history_manager import format_history
+from src.utils.ttl_cache import TTLCache
+from src.utils.answer_cache import SemanticAnswerCache, split_for_replay
+from src.warmup import is_ready, wait_until_ready, replace_vectorstore
 
 # Load environment variables
 load_dotenv()
@@ -13,38 +30,281 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Nombre de passages injectés dans le prompt
+RETRIEVAL_K = 3
+# Recherche hybride : fusion (RRF) des résultats denses et BM25
+HYBRID_RETRIEVAL = True
+HYBRID_FETCH_K = 10
+# Routage des questions vers les partitions thématiques (meteo, sol, statistique...) :
+# leurs passages sont favorisés dans la fusion, sans exclure le reste de la base
+PARTITION_ROUTING = True
+# Reranking optionnel par cross-encoder : sur-échantillonnage puis tri des candidats
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() in ("1", "true", "yes")
+RERANK_FETCH_K = 30
+RERANK_BUDGET_MS = int(os.getenv("RERANK_BUDGET_MS", "400"))
+# Caches en mémoire des embeddings de questions et des résultats de recherche
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_TTL = 6 * 3600
 
-def query_rag(question, soil_type="Non spécifié", location="Sénégal", chat_history=None):
+# Cache sémantique des réponses (persistant entre redémarrages)
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_PATH = os.path.join(BASE_DIR, "data", "answer_cache.sqlite3")
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_MAX_ENTRIES = 5000
+
+# Recherche spéculative pendant la reformulation des questions de suivi
+SPECULATIVE_RETRIEVAL = True
+# Similarité cosinus minimale pour réutiliser une recherche spéculative
+SPECULATIVE_REUSE_THRESHOLD = 0.9
+
+_speculation_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag-speculation")
+# Recherches lancées par aquery_rag (bloquantes, donc hors de la boucle asyncio)
+_retrieval_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rag-retrieval")
+
+UNAVAILABLE_MESSAGE = "Désolé, la base de connaissances n'est pas disponible actuellement."
+WARMUP_MESSAGE = "Préparation de l'assistant (chargement du modèle)..."
+
+_question_embeddings = TTLCache(maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
+_retrieval_results = TTLCache(maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
+_cache_index_version = None
+_partition_stores = {}
+_cache_version_lock = threading.Lock()
+
+
+def normalize_question(question):
+    """Normalise une question pour en faire une clé de cache (casse, accents composés, espaces, ponctuation finale)."""
+    question = unicodedata.normalize("NFC", question).lower()
+    question = re.sub(r"\s+", " ", question).strip()
+    return question.rstrip(" ?!.")
+
+
+def _check_index_version():
+    """Vide les caches de requêtes et rouvre la base vectorielle si elle a été reconstruite."""
+    global _cache_index_version
+    version = get_index_version()
+    with _cache_version_lock:
+        if version != _cache_index_version:
+            if _cache_index_version is not None:
+                logger.info("Base vectorielle reconstruite : réouverture et invalidation des caches de requêtes.")
+                replace_vectorstore(reopen_vectorstore)
+                clear_vectorstore_cache()
+            _question_embeddings.clear()
+            _retrieval_results.clear()
+            _partition_stores.clear()
+            _cache_index_version = version
+
+
+def embed_question(vectorstore, question):
+    """Retourne l'embedding de la question, depuis le cache si possible."""
+    key = normalize_question(question)
+    embedding = _question_embeddings.get(key)
+    if embedding is None:
+        embedding = vectorstore.embeddings.embed_query(question)
+        _question_embeddings.set(key, embedding)
+    return embedding
+
+
+def _get_partition_store(vectorstore, category):
+    """Vue LangChain sur la collection d'une catégorie, ou None si elle n'existe pas."""
+    name = partition_name(category)
+    if name not in _partition_stores:
+        try:
+            vectorstore._client.get_collection(name)
+        except Exception:
+            return None
+        _partition_stores[name] = Chroma(
+            client=vectorstore._client,
+            collection_name=name,
+            embedding_function=vectorstore.embeddings
+        )
+    return _partition_stores[name]
+
+
+def _partition_search(vectorstore, embedding, k, categories):
+    """Recherche limitée aux catégories, ou None si leurs partitions n'existent pas toutes."""
+    if isinstance(vectorstore, MmapVectorStore):
+        # Index mmap/HNSW : les catégories sont filtrées dans l'index lui-même
+        return vectorstore.similarity_search_by_vector(embedding, k=k, categories=categories)
+    stores = [_get_partition_store(vectorstore, c) for c in categories]
+    if not all(store is not None for store in stores):
+        return None
+    scored = []
+    for store in stores:
+        scored.extend(store.similarity_search_by_vector_with_relevance_scores(embedding, k=k))
+    # Scores = distances : plus petit = plus proche
+    scored.sort(key=lambda item: item[1])
+    return [doc for doc, _ in scored[:k]]
+
+
+def _search(vectorstore, question, k):
     """
-    Exécute une requête via la chaîne RAG avec agent de reformulation pour les follow-ups.
-    Générateur qui yield des événements de type:
-    - {"type": "status", "content": "Message de statut..."}
-    - {"type": "chunk", "content": "Texte partiel de la réponse..."}
+    Recherche dense, fusionnée avec BM25 (RRF) si l'index lexical existe. Le routage par
+    catégorie est souple : les passages des partitions routées sont ajoutés à la fusion
+    (ce qui les favorise) sans remplacer les résultats sur toute la base, si bien qu'une
+    partition petite ou mal routée ne limite pas la recherche.
     """
-    if chat_history is None:
-        chat_history = []
-        
-    # --- PHASE 0 : VÉRIFICATIONS ---
-    yield {"type": "status", "content": "Vérification de la base de connaissances..."}
-    vectorstore = get_vectorstore()
-    if not vectorstore:
-        yield {"type": "chunk", "content": "Désolé, la base de connaissances n'est pas disponible actuellement."}
-        return
-        
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
+    embedding = embed_question(vectorstore, question)
+    categories = route_question(question) if PARTITION_ROUTING else None
+    bm25 = get_bm25_index() if HYBRID_RETRIEVAL else None
+    if bm25 is None and not categories:
+        return vectorstore.similarity_search_by_vector(embedding, k=k)
+    fetch_k = max(k, HYBRID_FETCH_K)
+    result_lists = [vectorstore.similarity_search_by_vector(embedding, k=fetch_k)]
+    if categories:
+        partition_docs = _partition_search(vectorstore, embedding, fetch_k, categories)
+        if partition_docs:
+            result_lists.append(partition_docs)
+    if bm25 is not None:
+        hits = bm25.search(question, fetch_k * 4 if categories else fetch_k)
+        lexical_docs = bm25.get_documents([chunk_id for chunk_id, _ in hits])
+        result_lists.append(lexical_docs[:fetch_k])
+        if categories:
+            result_lists.append([
+                doc for doc in lexical_docs if doc.metadata.get("category") in categories
+            ][:fetch_k])
+    return reciprocal_rank_fusion(result_lists, k)
+
+
+def retrieve_documents(vectorstore, question, k=RETRIEVAL_K):
+    """
+    Recherche les k passages les plus pertinents (dense + BM25 fusionnés par RRF
+    si l'index lexical existe, puis reranking optionnel), avec cache LRU+TTL.
+    """
+    _check_index_version()
+    key = (normalize_question(question), k)
+    docs = _retrieval_results.get(key)
+    if docs is None:
+        complete = True
+        if RERANK_ENABLED:
+            candidates = _search(vectorstore, question, max(k, RERANK_FETCH_K))
+            docs, complete = rerank(question, candidates, k, RERANK_BUDGET_MS)
+        else:
+            docs = _search(vectorstore, question, k)
+        # Un reranking abandonné (budget dépassé) n'est pas mis en cache
+        if complete:
+            _retrieval_results.set(key, docs)
+    return docs
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = sum(x * x for x in a) ** 0.5
+    norm_b = sum(y * y for y in b) ** 0.5
+    return dot / (norm_a * norm_b) if norm_a and norm_b else 0.0
+
+
+def _merge_results(result_lists, k):
+    """Fusionne plusieurs listes de passages en alternant les rangs, sans doublons."""
+    merged, seen = [], set()
+    for rank in range(max((len(r) for r in result_lists), default=0)):
+        for results in result_lists:
+            if rank < len(results) and results[rank].page_content not in seen:
+                seen.add(results[rank].page_content)
+                merged.append(results[rank])
+    return merged[:k]
+
+
+def start_speculative_retrieval(vectorstore, question, chat_history, k=RETRIEVAL_K):
+    """
+    Lance en arrière-plan la recherche sur la question brute et sur une variante
+    enrichie du dernier message utilisateur, pendant que le LLM reformule la question.
+    Retourne une liste de (variante, future).
+    """
+    variants = [question]
+    if chat_history:
+        variants.append(f"{chat_history[-1][0]} {question}")
+    return [
+        (variant, _speculation_pool.submit(retrieve_documents, vectorstore, variant, k))
+        for variant in variants
+    ]
+
+
+def resolve_speculative_retrieval(vectorstore, standalone_question, speculations, k=RETRIEVAL_K):
+    """
+    Réutilise les recherches spéculatives dont la variante est assez proche de la
+    question reformulée (fusionnées si plusieurs le sont), sinon relance une recherche.
+    """
+    target = embed_question(vectorstore, standalone_question)
+    reusable = []
+    for variant, future in speculations:
+        try:
+            docs = future.result()
+        except Exception as e:
+            logger.warning(f"Recherche spéculative en échec : {e}")
+            continue
+        similarity = _cosine(target, embed_question(vectorstore, variant))
+        if similarity >= SPECULATIVE_REUSE_THRESHOLD:
+            reusable.append((similarity, docs))
+    if not reusable:
+        logger.info("Recherche spéculative non réutilisable, nouvelle recherche.")
+        return retrieve_documents(vectorstore, standalone_question, k)
+    logger.info(f"Recherche spéculative réutilisée ({len(reusable)} variante(s)).")
+    reusable.sort(key=lambda item: item[0], reverse=True)
+    return _merge_results([docs for _, docs in reusable], k)
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    """Retourne le cache sémantique des réponses, ou None s'il est désactivé/indisponible."""
+    global _answer_cache
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            try:
+                _answer_cache = SemanticAnswerCache(
+                    ANSWER_CACHE_PATH,
+                    threshold=ANSWER_CACHE_THRESHOLD,
+                    max_entries=ANSWER_CACHE_MAX_ENTRIES
+                )
+            except Exception as e:
+                logger.warning(f"Cache de réponses indisponible : {e}")
+    return _answer_cache
+
+
+def get_cache_stats():
+    """Compteurs de hits/misses des caches de requêtes."""
+    stats = {
+        "question_embeddings": _question_embeddings.stats(),
+        "retrieval_results": _retrieval_results.stats(),
+    }
+    if _answer_cache is not None:
+        stats["answers"] = _answer_cache.stats()
+    return stats
+
+
+SUMMARY_TEMPLATE = """
+Vous tenez à jour le résumé d'une conversation entre un agriculteur et Tèwou Agro-Assistant.
+Intégrez les nouveaux échanges au résumé existant, en quelques phrases, en gardant les faits
+utiles pour la suite (cultures, parcelles, localités, problèmes rencontrés, conseils déjà donnés).
+
+RÉSUMÉ EXISTANT :
+{summary}
+
+NOUVEAUX ÉCHANGES :
+{turns}
+
+RÉSUMÉ MIS À JOUR :
+"""
+
+
+def summarize_history(summary, turns):
+    """Met à jour le résumé glissant avec des échanges sortis de la fenêtre récente."""
     llm = ChatCohere(model="command-r-08-2024")
-    
-    def format_history(history):
-        formatted = ""
-        for user_msg, ai_msg in history:
-            formatted += f"Utilisateur: {user_msg}\nAssistant: {ai_msg}\n"
-        return formatted
+    chain = ChatPromptTemplate.from_template(SUMMARY_TEMPLATE) | llm | StrOutputParser()
+    return chain.invoke({
+        "summary": summary or "(aucun)",
+        "turns": format_history(turns, token_budget=float("inf"))
+    }).strip()
 
-    # --- ÉTAPE 1 : CONTEXTUALISATION ---
-    # Cette étape transforme une question de suivi (ex: "Et pour l'engrais ?") 
-    # en une question autonome compréhensible par le moteur de recherche.
-    
-    contextualize_template = """
+
+# --- PROMPTS ---
+# Transforme une question de suivi (ex: "Et pour l'engrais ?")
+# en une question autonome compréhensible par le moteur de recherche.
+CONTEXTUALIZE_TEMPLATE = """
     Étant donné l'historique de la conversation et la question actuelle de l'utilisateur, 
     si la question fait référence à des éléments précédents, reformulez-la en une question autonome 
     qui peut être comprise sans l'historique. Ne répondez pas à la question, reformulez-la simplement.
@@ -57,23 +317,9 @@ def query_rag(question, soil_type="Non spécifié", location="Sénégal", chat_h
     
     QUESTION AUTONOME REFORMULÉE :
     """
-    contextualize_prompt = ChatPromptTemplate.from_template(contextualize_template)
-    contextualize_chain = contextualize_prompt | llm | StrOutputParser()
-    
-    standalone_question = question
-    if chat_history:
-        yield {"type": "status", "content": "Compréhension du contexte..."}
-        standalone_question = contextualize_chain.invoke({
-            "chat_history": format_history(chat_history),
-            "question": question
-        })
-        logger.info(f"Question reformulée : {standalone_question}")
 
-    # --- ÉTAPE 2 : RÉPONSE FINALE AVEC RAG ---
-    yield {"type": "status", "content": "Recherche d'informations pertinentes..."}
-    
-    # Prompt système ultra-structuré 
-    template = """
+# Prompt système ultra-structuré
+ANSWER_TEMPLATE = """
     # 🎯 IDENTITÉ ET MANDAT
     Vous êtes **Tèwou Agro-Assistant**, un expert agricole sénégalais virtuel. Votre mission est d'accompagner les agriculteurs avec des conseils pratiques, précis et bienveillants, exclusivement centrés sur l'agriculture au Sénégal.
 
@@ -113,38 +359,206 @@ def query_rag(question, soil_type="Non spécifié", location="Sénégal", chat_h
     **Commencez maintenant votre réponse :
     """
 
-    prompt = ChatPromptTemplate.from_template(template)
-    
-    def format_docs(docs):
-        return "\n\n".join(doc.page_content for doc in docs)
 
-    # Détermination de l'instruction de présentation
-    intro_text = "Présentez-vous brièvement comme Tèwou Agro-Assistant." if not chat_history else "NE VOUS PRÉSENTEZ PAS. Répondez directement à la question."
+def _build_chains(llm):
+    """Chaînes de contextualisation et de génération finale."""
+    contextualize_chain = ChatPromptTemplate.from_template(CONTEXTUALIZE_TEMPLATE) | llm | StrOutputParser()
+    final_chain = ChatPromptTemplate.from_template(ANSWER_TEMPLATE) | llm | StrOutputParser()
+    return contextualize_chain, final_chain
 
-    # Pour le streaming, on doit construire la chaîne légèrement différemment pour récupérer les documents si besoin,
-    # mais pour simplifier ici on garde la structure et on stream la réponse finale.
-    
-    # 1. Récupération explicite des docs (pour pouvoir logger ou yield si besoin)
-    docs = retriever.invoke(standalone_question)
-    formatted_context = format_docs(docs)
-    
-    yield {"type": "status", "content": "Rédaction de la réponse..."}
 
-    # 2. Chaîne de génération finale
-    final_chain = prompt | llm | StrOutputParser()
+def format_docs(docs):
+    return "\n\n".join(doc.page_content for doc in docs)
+
+
+def _introduction_instruction(chat_history):
+    if not chat_history:
+        return "Présentez-vous brièvement comme Tèwou Agro-Assistant."
+    return "NE VOUS PRÉSENTEZ PAS. Répondez directement à la question."
+
+
+def _lookup_cached_answer(vectorstore, standalone_question, soil_type, location, first_turn):
+    """Retourne (embedding de la question, réponse en cache ou None)."""
+    answer_cache = get_answer_cache()
+    if answer_cache is None:
+        return None, None
+    _check_index_version()
+    question_embedding = embed_question(vectorstore, standalone_question)
+    cached_answer = answer_cache.lookup(
+        question_embedding, soil_type, location,
+        first_turn=first_turn, index_version=get_index_version()
+    )
+    return question_embedding, cached_answer
+
+
+def _store_answer(standalone_question, question_embedding, answer, soil_type, location, first_turn):
+    answer_cache = get_answer_cache()
+    if answer_cache is None or question_embedding is None or not answer:
+        return
+    try:
+        answer_cache.store(
+            standalone_question, question_embedding, answer,
+            soil_type, location, first_turn=first_turn,
+            index_version=get_index_version()
+        )
+    except Exception as e:
+        logger.warning(f"Impossible d'enregistrer la réponse dans le cache : {e}")
+
+
+def _retrieve_for_turn(vectorstore, standalone_question, speculations):
+    if speculations:
+        return resolve_speculative_retrieval(vectorstore, standalone_question, speculations)
+    return retrieve_documents(vectorstore, standalone_question)
+
+
+def _ready_vectorstore():
+    """Base vectorielle préchauffée par src.warmup (repli sur le chargement direct en cas d'échec)."""
+    # Avant de prendre la base : après une reconstruction, elle est d'abord rouverte
+    _check_index_version()
+    vectorstore = wait_until_ready()
+    return vectorstore if vectorstore is not None else get_vectorstore()
+
+
+def query_rag(question, soil_type="Non spécifié", location="Sénégal", chat_history=None, history_summary=None):
+    """
+    Exécute une requête via la chaîne RAG avec agent de reformulation pour les follow-ups.
+    chat_history contient les échanges récents non résumés, history_summary le résumé
+    glissant des plus anciens (voir src.utils.history_manager).
+    Générateur qui yield des événements de type:
+    - {"type": "status", "content": "Message de statut..."}
+    - {"type": "chunk", "content": "Texte partiel de la réponse..."}
+    """
+    if chat_history is None:
+        chat_history = []
+        
+    # --- PHASE 0 : VÉRIFICATIONS ---
+    yield {"type": "status", "content": "Vérification de la base de connaissances..."}
+    if not is_ready():
+        yield {"type": "status", "content": WARMUP_MESSAGE}
+    vectorstore = _ready_vectorstore()
+    if not vectorstore:
+        yield {"type": "chunk", "content": UNAVAILABLE_MESSAGE}
+        return
+        
+    llm = ChatCohere(model="command-r-08-2024")
+    contextualize_chain, final_chain = _build_chains(llm)
+    formatted_history = format_history(chat_history, history_summary)
+    first_turn = not chat_history
+
+    # --- ÉTAPE 1 : CONTEXTUALISATION ---
+    standalone_question = question
+    speculations = None
+    if chat_history:
+        yield {"type": "status", "content": "Compréhension du contexte..."}
+        if SPECULATIVE_RETRIEVAL:
+            speculations = start_speculative_retrieval(vectorstore, question, chat_history)
+        standalone_question = contextualize_chain.invoke({
+            "chat_history": formatted_history,
+            "question": question
+        })
+        logger.info(f"Question reformulée : {standalone_question}")
+
+    # --- CACHE SÉMANTIQUE DES RÉPONSES ---
+    question_embedding, cached_answer = _lookup_cached_answer(
+        vectorstore, standalone_question, soil_type, location, first_turn
+    )
+    if cached_answer:
+        yield {"type": "status", "content": "Réponse trouvée dans la base de réponses..."}
+        for piece in split_for_replay(cached_answer):
+            yield {"type": "chunk", "content": piece}
+        return
+
+    # --- ÉTAPE 2 : RÉPONSE FINALE AVEC RAG ---
+    yield {"type": "status", "content": "Recherche d'informations pertinentes..."}
+    docs = _retrieve_for_turn(vectorstore, standalone_question, speculations)
     
+    yield {"type": "status", "content": "Rédaction de la réponse..."}
     response_stream = final_chain.stream({
-        "context": formatted_context,
-        "chat_history": format_history(chat_history),
+        "context": format_docs(docs),
+        "chat_history": formatted_history,
         "question": question,
         "soil_type": soil_type,
         "location": location,
-        "introduction_instruction": intro_text
+        "introduction_instruction": _introduction_instruction(chat_history)
     })
     
+    full_answer = []
     for chunk in response_stream:
+        full_answer.append(chunk)
         yield {"type": "chunk", "content": chunk}
 
+    _store_answer(standalone_question, question_embedding, "".join(full_answer), soil_type, location, first_turn)
+
+
+async def aquery_rag(question, soil_type="Non spécifié", location="Sénégal", chat_history=None, history_summary=None):
+    """
+    Variante asynchrone de query_rag (même protocole d'événements status/chunk).
+    Les appels LLM passent par ainvoke/astream ; la recherche, bloquante, tourne dans
+    un pool de threads, ce qui permet à une seule boucle asyncio de servir de
+    nombreuses conversations simultanées.
+    """
+    if chat_history is None:
+        chat_history = []
+    loop = asyncio.get_running_loop()
+
+    yield {"type": "status", "content": "Vérification de la base de connaissances..."}
+    if not is_ready():
+        yield {"type": "status", "content": WARMUP_MESSAGE}
+    vectorstore = await loop.run_in_executor(_retrieval_pool, _ready_vectorstore)
+    if not vectorstore:
+        yield {"type": "chunk", "content": UNAVAILABLE_MESSAGE}
+        return
+
+    llm = ChatCohere(model="command-r-08-2024")
+    contextualize_chain, final_chain = _build_chains(llm)
+    formatted_history = format_history(chat_history, history_summary)
+    first_turn = not chat_history
+
+    standalone_question = question
+    speculations = None
+    if chat_history:
+        yield {"type": "status", "content": "Compréhension du contexte..."}
+        if SPECULATIVE_RETRIEVAL:
+            speculations = start_speculative_retrieval(vectorstore, question, chat_history)
+        standalone_question = await contextualize_chain.ainvoke({
+            "chat_history": formatted_history,
+            "question": question
+        })
+        logger.info(f"Question reformulée : {standalone_question}")
+
+    question_embedding, cached_answer = await loop.run_in_executor(
+        _retrieval_pool, _lookup_cached_answer,
+        vectorstore, standalone_question, soil_type, location, first_turn
+    )
+    if cached_answer:
+        yield {"type": "status", "content": "Réponse trouvée dans la base de réponses..."}
+        for piece in split_for_replay(cached_answer):
+            yield {"type": "chunk", "content": piece}
+        return
+
+    yield {"type": "status", "content": "Recherche d'informations pertinentes..."}
+    docs = await loop.run_in_executor(
+        _retrieval_pool, _retrieve_for_turn, vectorstore, standalone_question, speculations
+    )
+
+    yield {"type": "status", "content": "Rédaction de la réponse..."}
+    full_answer = []
+    async for chunk in final_chain.astream({
+        "context": format_docs(docs),
+        "chat_history": formatted_history,
+        "question": question,
+        "soil_type": soil_type,
+        "location": location,
+        "introduction_instruction": _introduction_instruction(chat_history)
+    }):
+        full_answer.append(chunk)
+        yield {"type": "chunk", "content": chunk}
+
+    await loop.run_in_executor(
+        _retrieval_pool, _store_answer,
+        standalone_question, question_embedding, "".join(full_answer), soil_type, location, first_turn
+    )
+
 if __name__ == "__main__":
     # Quick test
     import argparse
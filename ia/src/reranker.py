@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Petit cross-encoder multilingue (entraîné sur mMARCO, dont le français), exécuté sur CPU
+RERANK_MODEL_NAME = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+RERANK_MAX_LENGTH = 256
+
+_model = None
+_model_lock = threading.Lock()
+# Deux workers : un scoring qui a dépassé son budget ne bloque pas la requête suivante
+SCORING_WORKERS = 2
+_scoring_pool = ThreadPoolExecutor(max_workers=SCORING_WORKERS, thread_name_prefix="rerank")
+# Un job par worker au plus : rien n'attend dans la file derrière un scoring trop lent
+_scoring_slots = threading.BoundedSemaphore(SCORING_WORKERS)
+
+
+def get_reranker():
+    """Charge (une seule fois) le cross-encoder."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            from sentence_transformers import CrossEncoder
+            logger.info(f"Chargement du modèle de reranking : {RERANK_MODEL_NAME}")
+            _model = CrossEncoder(RERANK_MODEL_NAME, max_length=RERANK_MAX_LENGTH, device="cpu")
+    return _model
+
+
+def _score(question, docs):
+    model = get_reranker()
+    pairs = [(question, doc.page_content) for doc in docs]
+    # Un seul passage batché sur tous les candidats
+    return model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+
+
+def _submit(fn, *args):
+    """Soumet fn au pool si un worker est libre, sinon retourne None."""
+    if not _scoring_slots.acquire(blocking=False):
+        return None
+
+    def run():
+        try:
+            return fn(*args)
+        finally:
+            _scoring_slots.release()
+
+    try:
+        return _scoring_pool.submit(run)
+    except BaseException:
+        _scoring_slots.release()
+        raise
+
+
+def warm_up_reranker():
+    """Charge le modèle en arrière-plan pour que le premier appel tienne dans son budget."""
+    return _submit(get_reranker)
+
+
+def rerank(question, docs, top_n, budget_ms):
+    """
+    Réordonne les candidats par score du cross-encoder et garde les top_n meilleurs.
+    Si le scoring dépasse budget_ms (ou échoue), l'ordre d'origine est conservé.
+    Retourne (documents, reranked) où reranked indique si le reranking a abouti.
+    """
+    if len(docs) <= 1:
+        return docs[:top_n], True
+    start = time.perf_counter()
+    future = _submit(_score, question, docs)
+    if future is None:
+        logger.warning("Reranking ignoré : les workers sont encore occupés par des scorings précédents.")
+        return docs[:top_n], False
+    try:
+        scores = future.result(timeout=budget_ms / 1000)
+    except FutureTimeoutError:
+        # Un job pas encore démarré est retiré ; un job en cours garde son worker jusqu'au bout
+        if future.cancel():
+            _scoring_slots.release()
+        logger.warning(f"Reranking abandonné : budget de {budget_ms} ms dépassé.")
+        return docs[:top_n], False
+    except Exception as e:
+        logger.error(f"Erreur lors du reranking : {e}")
+        return docs[:top_n], False
+    ranked = sorted(zip(scores, range(len(docs))), key=lambda item: item[0], reverse=True)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"Reranking de {len(docs)} candidats en {elapsed_ms:.0f} ms.")
+    return [docs[i] for _, i in ranked[:top_n]], True
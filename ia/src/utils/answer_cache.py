@@ -0,0 +1,136 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _context_key(soil_type, location):
+    return (soil_type or "").strip().lower(), re.sub(r"\s+", " ", (location or "")).strip().lower()
+
+
+def _normalize(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def split_for_replay(answer):
+    """Découpe une réponse en morceaux (mot + espaces) pour la rejouer en streaming."""
+    return re.findall(r"\S+\s*|\s+", answer)
+
+
+class SemanticAnswerCache:
+    """
+    Cache persistant (SQLite) de réponses, retrouvées par similarité cosinus
+    de la question autonome, à type de sol / localisation / version d'index égaux.
+    Les entrées les moins récemment utilisées sont évincées au-delà de max_entries.
+    """
+
+    def __init__(self, path, threshold=0.95, max_entries=5000, ttl=7 * 24 * 3600):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # (sol, localisation, premier_tour, version) -> (signature, ids, matrice normalisée)
+        self._matrices = {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                soil_type TEXT NOT NULL,
+                location TEXT NOT NULL,
+                first_turn INTEGER NOT NULL,
+                index_version TEXT NOT NULL,
+                question TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_answers_context "
+            "ON answers(soil_type, location, first_turn, index_version)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_last_used ON answers(last_used)")
+        self._conn.commit()
+
+    def _load_context(self, context):
+        where = "soil_type = ? AND location = ? AND first_turn = ? AND index_version = ? AND created_at >= ?"
+        params = context + (time.time() - self.ttl,)
+        signature = self._conn.execute(
+            f"SELECT COUNT(*), MAX(id) FROM answers WHERE {where}", params
+        ).fetchone()
+        cached = self._matrices.get(context)
+        if cached and cached[0] == signature:
+            return cached[1], cached[2]
+        rows = self._conn.execute(f"SELECT id, embedding FROM answers WHERE {where}", params).fetchall()
+        ids = [row[0] for row in rows]
+        matrix = (
+            np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+            if rows else np.zeros((0, 0), dtype=np.float32)
+        )
+        self._matrices[context] = (signature, ids, matrix)
+        return ids, matrix
+
+    def lookup(self, embedding, soil_type, location, first_turn, index_version):
+        """Retourne la réponse stockée la plus proche si sa similarité dépasse le seuil, sinon None."""
+        context = _context_key(soil_type, location) + (int(first_turn), str(index_version))
+        query = _normalize(embedding)
+        with self._lock:
+            ids, matrix = self._load_context(context)
+            if not ids:
+                self.misses += 1
+                return None
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+            row = self._conn.execute("SELECT answer FROM answers WHERE id = ?", (ids[best],)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE answers SET last_used = ? WHERE id = ?", (time.time(), ids[best]))
+            self._conn.commit()
+            self.hits += 1
+            logger.info(f"Cache de réponses : hit (similarité {scores[best]:.3f}).")
+            return row[0]
+
+    def store(self, question, embedding, answer, soil_type, location, first_turn, index_version):
+        context = _context_key(soil_type, location) + (int(first_turn), str(index_version))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO answers (soil_type, location, first_turn, index_version, question, "
+                "embedding, answer, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                context + (question, _normalize(embedding).tobytes(), answer, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM answers WHERE created_at < ?", (now - self.ttl,))
+        count = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM answers WHERE id IN "
+                "(SELECT id FROM answers ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def stats(self):
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        return {"entries": count, "hits": self.hits, "misses": self.misses}
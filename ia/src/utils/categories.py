@@ -0,0 +1,68 @@
+import re
+import unicodedata
+
+# Thematic categories used to tag documents (see metadata.json) and route questions.
+# Keywords are accent-free whole words (plural allowed); a trailing "*" marks a prefix.
+CATEGORY_KEYWORDS = {
+    "meteo": [
+        "climat*", "meteo*", "pluie", "pluviometr*", "precipitation", "temperature", "secheresse",
+        "hivernage", "saison des pluies", "anacim", "vent", "inondation",
+    ],
+    "sol": [
+        "sol", "pedolog*", "dior", "deck", "fertilite", "salinisation", "salinite", "erosion",
+        "occupation du sol", "degradation des terres", "ocsol", "argileux", "sablonneux", "ferrugineux",
+    ],
+    "statistique": [
+        "statisti*", "chiffre", "production", "rendement", "superficie", "tonne", "hectare",
+        "campagne agricole", "enquete", "recensement", "situation economique", "combien",
+        "pourcentage", "indicateur",
+    ],
+    "bonne_pratique": [
+        "bonne pratique", "agriculture intelligente", "csa", "aic", "adaptation",
+        "itineraire technique", "semis", "semer", "fertilisation", "engrais", "compost",
+        "irrigation", "ravageur", "rotation",
+    ],
+}
+
+# Category given by process_pdfs to local documents, to be refined by classify_text
+UNSPECIFIED_CATEGORIES = ("", "document_local", None)
+DEFAULT_CATEGORY = "general"
+
+
+def fold(text):
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _pattern(keyword):
+    if keyword.endswith("*"):
+        return re.compile(r"\b" + re.escape(keyword[:-1]))
+    return re.compile(r"\b" + re.escape(keyword) + r"[sx]?\b")
+
+
+_PATTERNS = {
+    category: [_pattern(keyword) for keyword in keywords]
+    for category, keywords in CATEGORY_KEYWORDS.items()
+}
+
+
+def category_scores(text):
+    """
+    Number of keyword occurrences per category in an (accent-insensitive) text.
+    """
+    folded = fold(text)
+    return {
+        category: sum(len(pattern.findall(folded)) for pattern in patterns)
+        for category, patterns in _PATTERNS.items()
+    }
+
+
+def classify_text(title, text, sample_chars=20000):
+    """
+    Best category for a document, from its title (weighted) and the beginning of its text.
+    """
+    scores = category_scores(text[:sample_chars])
+    for category, score in category_scores(title).items():
+        scores[category] += 20 * score
+    best = max(scores, key=scores.get)
+    return best if scores[best] > 0 else DEFAULT_CATEGORY
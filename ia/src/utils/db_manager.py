@@ -1,12 +1,9 @@
 import os
 import logging
-import psycopg2
-from psycopg2 import pool
-from psycopg2.extras import RealDictCursor
+import threading
 import uuid
 import time
 from datetime import datetime
-from supabase import create_client, Client
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -16,16 +13,14 @@ logger = logging.getLogger(__name__)
 # Charger les variables d'environnement (.env)
 load_dotenv()
 
+# psycopg2 et supabase sont importés, et les connexions ouvertes, au premier usage :
+# la page de connexion s'affiche sans attendre le réseau ni la base.
+
 # --- CONFIGURATION SUPABASE ---
-supabase: Client = None
+supabase = None
 
-def get_supabase_client():
-    """Initialise et retourne le client Supabase avec diagnostics."""
-    global supabase
-    if supabase is not None:
-        return supabase
-    
-    # Tentative de récupération des clés
+def get_supabase_config():
+    """Récupère (url, key, source) de Supabase depuis l'environnement ou les secrets Streamlit."""
     url = os.getenv("SUPABASE_URL")
     key = os.getenv("SUPABASE_KEY")
     
@@ -39,9 +34,27 @@ def get_supabase_client():
                 source = "SECRETS"
         except:
             pass
+    return url, key, source
+
+def is_supabase_configured():
+    """Vérifie la présence des clés sans importer ni créer le client Supabase."""
+    if supabase is not None:
+        return True
+    url, key, _ = get_supabase_config()
+    return bool(url and key)
+
+def get_supabase_client():
+    """Initialise et retourne le client Supabase avec diagnostics."""
+    global supabase
+    if supabase is not None:
+        return supabase
+    
+    # Tentative de récupération des clés
+    url, key, source = get_supabase_config()
             
     if url and key:
         try:
+            from supabase import create_client
             supabase = create_client(url, key)
             logger.info(f"Client Supabase initialisé via {source}")
             return supabase
@@ -56,11 +69,9 @@ def get_supabase_client():
         logger.warning(msg)
     return None
 
-# Tentative d'initialisation au chargement
-get_supabase_client()
-
-# Pool de connexions PostgreSQL
+# Pool de connexions PostgreSQL (créé au premier accès à la base)
 connection_pool = None
+_pool_lock = threading.Lock()
 
 def init_db_pool():
     """Initialise le pool de connexions PostgreSQL."""
@@ -72,26 +83,34 @@ def init_db_pool():
         logger.warning("DATABASE_URL non définie. Utilisation du mode JSON fallback.")
         return None
     
-    logger.info("DATABASE_URL détectée. Tentative de connexion PostgreSQL...")
-    try:
-        connection_pool = psycopg2.pool.SimpleConnectionPool(
-            1, 10,  # min et max connexions
-            database_url
-        )
-        logger.info("Pool de connexions PostgreSQL initialisé avec succès.")
+    with _pool_lock:
+        # Un autre thread (rerun Streamlit concurrent) a pu l'initialiser entre-temps
+        if connection_pool is not None:
+            return connection_pool
         
-        # Créer les tables si elles n'existent pas
-        create_tables()
-        return connection_pool
-    except Exception as e:
-        logger.error(f"Erreur lors de l'initialisation du pool PostgreSQL: {e}")
-        return None
+        logger.info("DATABASE_URL détectée. Tentative de connexion PostgreSQL...")
+        try:
+            from psycopg2 import pool
+            new_pool = pool.SimpleConnectionPool(
+                1, 10,  # min et max connexions
+                database_url
+            )
+            logger.info("Pool de connexions PostgreSQL initialisé avec succès.")
+            
+            # Créer les tables si elles n'existent pas
+            create_tables(new_pool)
+            connection_pool = new_pool
+            return connection_pool
+        except Exception as e:
+            logger.error(f"Erreur lors de l'initialisation du pool PostgreSQL: {e}")
+            return None
 
-def create_tables():
+def create_tables(db_pool=None):
     """Crée les tables nécessaires si elles n'existent pas."""
+    db_pool = db_pool or connection_pool
     conn = None
     try:
-        conn = connection_pool.getconn()
+        conn = db_pool.getconn()
         cursor = conn.cursor()
         
         # Table des sessions (avec user_id optionnel pour compatibilité)
@@ -106,6 +125,12 @@ def create_tables():
             );
         """)
         
+        # Résumé glissant de l'historique (voir src.utils.history_manager)
+        cursor.execute("""
+            ALTER TABLE chat_sessions ADD COLUMN IF NOT EXISTS summary TEXT;
+            ALTER TABLE chat_sessions ADD COLUMN IF NOT EXISTS summarized_turns INTEGER DEFAULT 0;
+        """)
+        
         # Index pour optimiser les requêtes
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_session_id ON chat_sessions(session_id);
@@ -136,7 +161,7 @@ def create_tables():
             conn.rollback()
     finally:
         if conn:
-            connection_pool.putconn(conn)
+            db_pool.putconn(conn)
 
 def get_connection():
     """Récupère une connexion du pool."""
@@ -187,6 +212,18 @@ def sign_out():
             pass
     return False
 
+def get_user_from_token(access_token):
+    """Retourne l'utilisateur Supabase d'un jeton d'accès (JWT) valide, sinon None."""
+    client = get_supabase_client()
+    if not client or not access_token:
+        return None
+    try:
+        res = client.auth.get_user(access_token)
+        return res.user if res else None
+    except Exception as e:
+        logger.warning(f"Jeton d'accès refusé: {e}")
+        return None
+
 # --- GESTION DES CHATS ---
 
 def create_new_session():
@@ -244,6 +281,89 @@ def save_chat(session_id, messages, user_id=None, title=None):
         if conn:
             release_connection(conn)
 
+def get_session_owner(session_id):
+    """Retourne (session existante, user_id du propriétaire ou None)."""
+    conn = None
+    try:
+        conn = get_connection()
+        if not conn:
+            return False, None
+        cursor = conn.cursor()
+        cursor.execute("SELECT user_id FROM chat_sessions WHERE session_id = %s", (session_id,))
+        row = cursor.fetchone()
+        return (True, str(row[0]) if row[0] else None) if row else (False, None)
+    except Exception as e:
+        logger.error(f"Erreur lors de la vérification de la session: {e}")
+        return False, None
+    finally:
+        if conn:
+            release_connection(conn)
+
+def get_chat_messages(session_id):
+    """Récupère les messages d'une session, dans l'ordre."""
+    conn = None
+    try:
+        conn = get_connection()
+        if not conn:
+            return []
+        from psycopg2.extras import RealDictCursor
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute("""
+            SELECT role, content 
+            FROM chat_messages 
+            WHERE session_id = %s 
+            ORDER BY created_at, id
+        """, (session_id,))
+        return [{"role": m["role"], "content": m["content"]} for m in cursor.fetchall()]
+    except Exception as e:
+        logger.error(f"Erreur lors du chargement des messages: {e}")
+        return []
+    finally:
+        if conn:
+            release_connection(conn)
+
+def get_session_summary(session_id):
+    """Récupère le résumé glissant d'une session : (résumé, nombre d'échanges couverts)."""
+    conn = None
+    try:
+        conn = get_connection()
+        if not conn:
+            return None, 0
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT summary, COALESCE(summarized_turns, 0) FROM chat_sessions WHERE session_id = %s",
+            (session_id,)
+        )
+        row = cursor.fetchone()
+        return (row[0], row[1]) if row else (None, 0)
+    except Exception as e:
+        logger.error(f"Erreur lors du chargement du résumé: {e}")
+        return None, 0
+    finally:
+        if conn:
+            release_connection(conn)
+
+def save_session_summary(session_id, summary, summarized_turns):
+    """Enregistre le résumé glissant d'une session."""
+    conn = None
+    try:
+        conn = get_connection()
+        if not conn:
+            return
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE chat_sessions SET summary = %s, summarized_turns = %s WHERE session_id = %s",
+            (summary, summarized_turns, session_id)
+        )
+        conn.commit()
+    except Exception as e:
+        logger.error(f"Erreur lors de la sauvegarde du résumé: {e}")
+        if conn:
+            conn.rollback()
+    finally:
+        if conn:
+            release_connection(conn)
+
 def load_all_chats(user_id=None):
     """Charge toutes les sessions de chat filtrées par utilisateur."""
     conn = None
@@ -252,6 +372,7 @@ def load_all_chats(user_id=None):
         if not conn:
             return {}
         
+        from psycopg2.extras import RealDictCursor
         cursor = conn.cursor(cursor_factory=RealDictCursor)
         
         if user_id:
@@ -332,6 +453,3 @@ def delete_all_chats(user_id=None):
         return False
     finally:
         if conn: release_connection(conn)
-
-init_db_pool()
-
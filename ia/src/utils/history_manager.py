@@ -0,0 +1,63 @@
+# Historique de conversation à taille bornée : les derniers échanges sont gardés
+# tels quels, les plus anciens sont résumés de façon incrémentale (résumé glissant).
+
+# Nombre d'échanges (question, réponse) récents conservés mot pour mot
+HISTORY_TURNS_VERBATIM = 4
+# Le résumé n'est mis à jour qu'au-delà de ce nombre d'échanges non résumés :
+# un appel au LLM tous les HISTORY_TURNS_VERBATIM échanges, au lieu d'un par échange
+HISTORY_FOLD_TRIGGER = 2 * HISTORY_TURNS_VERBATIM
+# Budget approximatif (en tokens) de l'historique injecté dans chaque prompt
+HISTORY_TOKEN_BUDGET = 1500
+# Longueur maximale d'une réponse de l'assistant recopiée dans l'historique
+MAX_ANSWER_CHARS = 1200
+
+
+def estimate_tokens(text):
+    """Estimation grossière : ~4 caractères par token."""
+    return len(text) // 4 + 1
+
+
+def _truncate(text, max_chars):
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + " […]"
+
+
+def pending_turns(chat_history, summarized_turns):
+    """Échanges non encore couverts par le résumé."""
+    return chat_history[summarized_turns:]
+
+
+def format_history(chat_history, summary=None, token_budget=HISTORY_TOKEN_BUDGET):
+    """
+    Formate le résumé glissant suivi des échanges récents, en retirant les plus
+    anciens échanges si le budget de tokens est dépassé.
+    """
+    header = f"Résumé des échanges précédents : {summary}\n" if summary else ""
+    lines = [
+        f"Utilisateur: {user_msg}\nAssistant: {_truncate(ai_msg, MAX_ANSWER_CHARS)}\n"
+        for user_msg, ai_msg in chat_history
+    ]
+    budget = token_budget - estimate_tokens(header)
+    kept = []
+    for line in reversed(lines):
+        cost = estimate_tokens(line)
+        if kept and cost > budget:
+            break
+        kept.append(line)
+        budget -= cost
+    return header + "".join(reversed(kept))
+
+
+def fold_history(chat_history, summary, summarized_turns, summarize_fn,
+                 keep_turns=HISTORY_TURNS_VERBATIM, fold_trigger=HISTORY_FOLD_TRIGGER):
+    """
+    Quand plus de fold_trigger échanges ne sont pas encore résumés, intègre au résumé
+    ceux sortis de la fenêtre des keep_turns derniers (en un seul appel).
+    Seuls les échanges pas encore résumés sont envoyés à summarize_fn(résumé, échanges),
+    le résumé n'est donc jamais recalculé depuis le début.
+    Retourne (résumé, nombre d'échanges couverts).
+    """
+    if len(chat_history) - summarized_turns <= fold_trigger:
+        return summary, summarized_turns
+    fold_until = len(chat_history) - keep_turns
+    new_summary = summarize_fn(summary, chat_history[summarized_turns:fold_until])
+    return new_summary, fold_until
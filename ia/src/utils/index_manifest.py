@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+MANIFEST_VERSION = 1
+
+
+def document_key(doc):
+    """
+    Returns the stable key identifying the source document of a Document or chunk.
+    """
+    return f"{doc.metadata.get('type', 'unknown')}:{doc.metadata.get('source', '')}"
+
+
+def _update_hash(h, doc):
+    h.update(doc.page_content.encode("utf-8"))
+    h.update(b"\0")
+    h.update(json.dumps(doc.metadata, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    h.update(b"\0")
+
+
+def document_hash(docs):
+    """
+    Hashes the content and metadata of all documents sharing one key.
+    """
+    h = hashlib.sha256()
+    for doc in docs:
+        _update_hash(h, doc)
+    return h.hexdigest()
+
+
+def document_hashes(documents):
+    """
+    Returns {document_key: document_hash} for documents from any iterable,
+    holding only one document at a time.
+    """
+    hashers = OrderedDict()
+    for doc in documents:
+        _update_hash(hashers.setdefault(document_key(doc), hashlib.sha256()), doc)
+    return OrderedDict((key, h.hexdigest()) for key, h in hashers.items())
+
+
+def chunk_ids(key, chunks, seen=None):
+    """
+    Returns deterministic, content-based ids for the chunks of one document.
+    Identical chunk texts inside the same document are told apart by their occurrence;
+    the metadata is part of the id so that metadata-only changes are rewritten too.
+    To compute the ids of a document's chunks in several calls, pass the same
+    `seen` dict (occurrence counts by chunk digest) to each call.
+    """
+    seen = {} if seen is None else seen
+    ids = []
+    for chunk in chunks:
+        digest = hashlib.sha1(chunk.page_content.encode("utf-8")).digest()
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        metadata = json.dumps(chunk.metadata, sort_keys=True, ensure_ascii=False)
+        raw = f"{key}\0{occurrence}\0{metadata}\0{chunk.page_content}"
+        ids.append(hashlib.sha1(raw.encode("utf-8")).hexdigest())
+    return ids
+
+
+def load_manifest(path):
+    """
+    Loads the index manifest, or returns None if it is missing or unreadable.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(path, manifest):
+    """
+    Atomically writes the index manifest.
+    """
+    manifest["version"] = MANIFEST_VERSION
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
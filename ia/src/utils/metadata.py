@@ -1,41 +1,113 @@
 import json
 import os
-from datetime import datetime
+import sqlite3
+from contextlib import closing
 
-# Path relative to the root of the 'ia' directory where app.py is run
-METADATA_PATH = os.path.join("..", "web_scrapping", "data_collection", "metadata.json")
+# Read-only access to the metadata collected by the scrapers. The store itself
+# (schema, import of metadata.json, writes) is web_scrapping/utils/metadata.py;
+# the app only reads the `metadata` table, or the metadata.json snapshot when the
+# store is missing or unreadable.
+DATA_DIR = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "web_scrapping", "data_collection"
+))
+METADATA_PATH = os.path.join(DATA_DIR, "metadata.json")
+METADATA_DB_PATH = os.path.join(DATA_DIR, "metadata.sqlite3")
+# Precomputed corpus statistics ("collection" section written by the scrapers,
+# "index" section by the index builder)
+CORPUS_STATS_PATH = os.path.join(DATA_DIR, "corpus_stats.json")
+# Seconds a reader waits while a scraper holds the write lock
+LOCK_TIMEOUT = 30
 
-def initialize_metadata():
+def _paths(data_dir):
+    if data_dir is None:
+        return METADATA_DB_PATH, METADATA_PATH
+    return os.path.join(data_dir, "metadata.sqlite3"), os.path.join(data_dir, "metadata.json")
+
+def _read_store(db_path):
     """
-    Initializes the metadata file if it doesn't exist.
+    Returns the records of the SQLite store, or None if it cannot be read.
     """
-    if not os.path.exists(METADATA_PATH):
-        # We probably shouldn't create it here if it's supposed to be in web_scrapping,
-        # but for safety:
-        os.makedirs(os.path.dirname(METADATA_PATH), exist_ok=True)
-        with open(METADATA_PATH, 'w', encoding='utf-8') as f:
-            json.dump([], f, indent=4)
+    try:
+        # Read-only: never creates the store, and never waits for writers (WAL)
+        with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=LOCK_TIMEOUT)) as conn:
+            return [json.loads(entry) for (entry,) in conn.execute("SELECT entry FROM metadata ORDER BY id")]
+    except sqlite3.Error:
+        # Store not initialized yet, or written by an incompatible version
+        return None
 
-def add_metadata(entry):
+def iter_metadata(data_dir=None):
     """
-    Adds a new entry to the metadata record.
+    Yields the metadata records one at a time, in insertion order.
     """
-    initialize_metadata()
-    
-    with open(METADATA_PATH, 'r+', encoding='utf-8') as f:
-        data = json.load(f)
-        if "timestamp" not in entry:
-            entry["timestamp"] = datetime.now().isoformat()
-        data.append(entry)
-        f.seek(0)
-        json.dump(data, f, indent=4, ensure_ascii=False)
-        f.truncate()
+    db_path, json_path = _paths(data_dir)
+    records = _read_store(db_path) if os.path.exists(db_path) else None
+    if records is not None:
+        yield from records
+    elif os.path.exists(json_path):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
 
-def get_all_metadata():
+def get_all_metadata(data_dir=None):
     """
     Returns the list of all metadata records.
     """
-    if not os.path.exists(METADATA_PATH):
-        return []
-    with open(METADATA_PATH, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return list(iter_metadata(data_dir))
+
+def read_corpus_stats(path=CORPUS_STATS_PATH):
+    """
+    Returns the corpus statistics, or {} if they were never written.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def update_corpus_stats(section, values, path=CORPUS_STATS_PATH):
+    """
+    Replaces one section ("collection" or "index") of the corpus statistics.
+    """
+    stats = read_corpus_stats(path)
+    stats[section] = values
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def collection_summary(data_dir=None):
+    """
+    Number of collected documents, one per source_url as in the store (the JSON
+    snapshot may repeat a source_url).
+    """
+    sources = set()
+    anonymous = 0
+    for entry in iter_metadata(data_dir):
+        if entry.get("source_url"):
+            sources.add(entry["source_url"])
+        else:
+            anonymous += 1
+    return {"documents": len(sources) + anonymous}
+
+_corpus_stats = None
+_corpus_stats_mtime = None
+
+def get_corpus_stats(path=CORPUS_STATS_PATH):
+    """
+    Cached corpus statistics, re-read only when the file's mtime changes.
+    The file is generated (by the scrapers and the index builder), not versioned:
+    when it is missing or has no "collection" section, the document count is
+    computed from the metadata records instead.
+    Meant to be called on every Streamlit rerun.
+    """
+    global _corpus_stats, _corpus_stats_mtime
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    if _corpus_stats is None or mtime != _corpus_stats_mtime:
+        stats = read_corpus_stats(path) if mtime is not None else {}
+        if "collection" not in stats:
+            stats["collection"] = collection_summary()
+        _corpus_stats = stats
+        _corpus_stats_mtime = mtime
+    return _corpus_stats
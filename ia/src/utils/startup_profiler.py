@@ -0,0 +1,112 @@
+import os
+import sys
+import json
+import time
+import logging
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime
+
+# Mesure du démarrage à froid de l'application : durée des imports et temps
+# jusqu'au premier affichage, pour suivre les régressions d'un déploiement à l'autre.
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STARTUP_REPORT_PATH = os.path.join(BASE_DIR, "data", "startup_times.jsonl")
+
+# Modules importés par app.py avant le premier affichage, puis ceux chargés à la demande
+STARTUP_MODULES = [
+    "streamlit",
+    "dotenv",
+    "src.utils.db_manager",
+    "src.utils.metadata",
+    "src.utils.history_manager",
+]
+LAZY_MODULES = ["src.rag_chain", "supabase", "psycopg2"]
+
+# Début du script : ce module est le premier importé par app.py
+START = time.perf_counter()
+_import_times = {}
+_first_paint_ms = None
+
+
+@contextmanager
+def track(name):
+    """Mesure la durée des imports du bloc (uniquement au premier passage du processus)."""
+    t0 = time.perf_counter()
+    yield
+    _import_times.setdefault(name, (time.perf_counter() - t0) * 1000)
+
+
+def mark_first_paint():
+    """
+    Enregistre le temps jusqu'au premier affichage, une seule fois par processus
+    (les reruns Streamlit suivants sont ignorés), et écrit le rapport de démarrage.
+    """
+    global _first_paint_ms
+    if _first_paint_ms is not None:
+        return
+    _first_paint_ms = (time.perf_counter() - START) * 1000
+    report = get_startup_report()
+    details = ", ".join(f"{name} {ms:.0f} ms" for name, ms in report["imports_ms"].items())
+    logger.info(f"Démarrage : premier affichage en {_first_paint_ms:.0f} ms (imports : {details}).")
+    try:
+        os.makedirs(os.path.dirname(STARTUP_REPORT_PATH), exist_ok=True)
+        with open(STARTUP_REPORT_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logger.warning(f"Impossible d'écrire le rapport de démarrage : {e}")
+
+
+def get_startup_report():
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "pid": os.getpid(),
+        "first_paint_ms": round(_first_paint_ms, 1) if _first_paint_ms is not None else None,
+        "imports_ms": {name: round(ms, 1) for name, ms in _import_times.items()},
+    }
+
+
+def measure_imports(modules):
+    """
+    Importe chaque module dans un interpréteur neuf avec -X importtime et retourne
+    la durée cumulée (ms) de chacun, dépendances comprises.
+    """
+    results = {}
+    for module in modules:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=BASE_DIR, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            logger.warning(f"Import de {module} impossible : {proc.stderr.strip().splitlines()[-1:]}")
+            results[module] = None
+            continue
+        # Lignes "import time: self [us] | cumulative | imported package"
+        for line in proc.stderr.splitlines():
+            parts = [p.strip() for p in line.removeprefix("import time:").split("|")]
+            if len(parts) == 3 and parts[2] == module:
+                results[module] = int(parts[1]) / 1000
+    return results
+
+
+def _print_section(title, timings):
+    print(title)
+    for module, ms in timings.items():
+        print(f"  {module:<30} {'échec' if ms is None else f'{ms:8.0f} ms'}")
+
+
+if __name__ == "__main__":
+    # Usage : python -m src.utils.startup_profiler (depuis le dossier ia/)
+    startup = measure_imports(STARTUP_MODULES)
+    _print_section("Imports avant le premier affichage :", startup)
+    print(f"  {'total (borne haute)':<30} {sum(ms or 0 for ms in startup.values()):8.0f} ms")
+    _print_section("Imports différés (premier usage) :", measure_imports(LAZY_MODULES))
+    if os.path.exists(STARTUP_REPORT_PATH):
+        with open(STARTUP_REPORT_PATH, encoding="utf-8") as f:
+            runs = [json.loads(line) for line in f if line.strip()]
+        print("Derniers démarrages de l'application :")
+        for run in runs[-5:]:
+            print(f"  {run['timestamp']}  premier affichage {run['first_paint_ms']} ms")
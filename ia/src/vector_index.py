@@ -0,0 +1,540 @@
+import os
+import json
+import mmap
+import time
+import shutil
+import logging
+import argparse
+import threading
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+from src.vector_quantization import (
+    QUANTIZATION_MODES, fit_int8, encode_int8, decode_int8, int8_distances,
+    fit_binary, encode_binary, hamming_distances
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Query-time dense index: "chroma" (default), "mmap" (exact top-k over a memory-mapped
+# matrix) or "hnsw" (approximate, for large corpora). mmap/hnsw are exported from the
+# Chroma collection at the end of each build.
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "chroma").lower()
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VECTOR_INDEX_DIR = os.path.join(BASE_DIR, "vector_index")
+INDEX_FORMAT_VERSION = 1
+# Compressed codes scanned by the mmap backend before rescoring: "none", "int8" or "binary"
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none").lower()
+# float16 halves the matrix size; distances are computed in float32. With quantization the
+# matrix is only read for rescored candidates, so it is kept in full precision.
+VECTOR_INDEX_DTYPE = os.getenv("VECTOR_INDEX_DTYPE", "float16" if VECTOR_QUANTIZATION == "none" else "float32")
+# Candidates rescored against the full-precision vectors, per requested result
+INT8_RESCORE_FACTOR = int(os.getenv("INT8_RESCORE_FACTOR", "4"))
+BINARY_RESCORE_FACTOR = int(os.getenv("BINARY_RESCORE_FACTOR", "30"))
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+# Rows read from Chroma, and scored per matrix product, at a time
+EXPORT_PAGE_SIZE = 5000
+SEARCH_BLOCK_ROWS = 65536
+
+
+def _read_meta(index_dir):
+    try:
+        with open(os.path.join(index_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != INDEX_FORMAT_VERSION:
+        return None
+    return meta
+
+
+def vector_index_is_current(index_dir, index_version, backend, quantization=VECTOR_QUANTIZATION):
+    """
+    True if index_dir holds an export of the current build usable by backend.
+    """
+    meta = _read_meta(index_dir)
+    if meta is None or meta.get("index_version") != index_version:
+        return False
+    if quantization != "none" and not meta.get("quantization"):
+        return False
+    return backend != "hnsw" or bool(meta.get("hnsw"))
+
+
+def _replace_dir(tmp_dir, index_dir):
+    # Processes that memory-mapped the old files keep reading them until they reload
+    old_dir = index_dir + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(index_dir):
+        os.replace(index_dir, old_dir)
+    os.replace(tmp_dir, index_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def export_vector_index(collection, index_dir=VECTOR_INDEX_DIR, dtype=VECTOR_INDEX_DTYPE, hnsw=False,
+                        index_version=None, m=HNSW_M, ef_construction=HNSW_EF_CONSTRUCTION):
+    """
+    Writes the vectors, texts and metadata of a Chroma collection to index_dir:
+    vectors.npy (memory-mappable matrix), sq_norms.npy, category_codes.npy,
+    chunks.jsonl + offsets.npy, int8 and binary codes, and hnsw.bin when hnsw is True.
+    The previous export is replaced atomically. Returns the number of vectors.
+    """
+    count = collection.count()
+    tmp_dir = index_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    start = time.perf_counter()
+    vectors = None
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    category_codes = np.zeros(count, dtype=np.int16)
+    categories = []
+    row = 0
+    with open(os.path.join(tmp_dir, "chunks.jsonl"), "wb") as chunks_file:
+        for page in range(0, count, EXPORT_PAGE_SIZE):
+            data = collection.get(include=["embeddings", "documents", "metadatas"],
+                                  limit=EXPORT_PAGE_SIZE, offset=page)
+            page_vectors = np.asarray(data["embeddings"], dtype=np.float32)
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(
+                    os.path.join(tmp_dir, "vectors.npy"), mode="w+",
+                    dtype=dtype, shape=(count, page_vectors.shape[1])
+                )
+            vectors[row:row + len(page_vectors)] = page_vectors
+            for chunk_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"]):
+                metadata = metadata or {}
+                category = metadata.get("category") or ""
+                if category not in categories:
+                    categories.append(category)
+                category_codes[row] = categories.index(category)
+                line = json.dumps({"id": chunk_id, "text": text, "metadata": metadata}, ensure_ascii=False)
+                chunks_file.write(line.encode("utf-8") + b"\n")
+                offsets[row + 1] = chunks_file.tell()
+                row += 1
+    if vectors is None:
+        logger.warning("Empty collection, nothing to export.")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return 0
+    vectors.flush()
+
+    # Norms of the stored (possibly float16) vectors, so distances match what is searched
+    sq_norms = np.concatenate([
+        (vectors[i:i + SEARCH_BLOCK_ROWS].astype(np.float32) ** 2).sum(axis=1)
+        for i in range(0, count, SEARCH_BLOCK_ROWS)
+    ])
+    np.save(os.path.join(tmp_dir, "sq_norms.npy"), sq_norms)
+    np.save(os.path.join(tmp_dir, "category_codes.npy"), category_codes)
+    np.save(os.path.join(tmp_dir, "offsets.npy"), offsets)
+    quantization = _export_codes(vectors, tmp_dir)
+
+    meta = {
+        "version": INDEX_FORMAT_VERSION,
+        "count": count,
+        "dim": int(vectors.shape[1]),
+        "dtype": dtype,
+        "distance": "l2",
+        "categories": categories,
+        "index_version": index_version,
+        "hnsw": None,
+        "quantization": quantization,
+    }
+    if hnsw:
+        import hnswlib
+        graph = hnswlib.Index(space="l2", dim=meta["dim"])
+        graph.init_index(max_elements=count, M=m, ef_construction=ef_construction)
+        for i in range(0, count, EXPORT_PAGE_SIZE):
+            block = np.asarray(vectors[i:i + EXPORT_PAGE_SIZE], dtype=np.float32)
+            graph.add_items(block, np.arange(i, i + len(block)))
+        graph.save_index(os.path.join(tmp_dir, "hnsw.bin"))
+        meta["hnsw"] = {"M": m, "ef_construction": ef_construction}
+    del vectors
+
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    _replace_dir(tmp_dir, index_dir)
+    float32_mb = count * meta["dim"] * 4 / 2**20
+    logger.info(
+        f"Exported {count} vector(s) to {index_dir} ({dtype}{', HNSW' if hnsw else ''}) "
+        f"in {time.perf_counter() - start:.1f}s. Scanned data: float32 {float32_mb:.1f} MB, "
+        f"int8 {quantization['int8_mb']:.1f} MB, binary {quantization['binary_mb']:.1f} MB."
+    )
+    return count
+
+
+def _export_codes(vectors, tmp_dir):
+    """
+    Writes the int8 and binary codes of the matrix (see src.vector_quantization).
+    """
+    count, dim = vectors.shape
+    lo, step = fit_int8(vectors, SEARCH_BLOCK_ROWS)
+    mean = fit_binary(vectors, SEARCH_BLOCK_ROWS)
+    int8_codes = np.lib.format.open_memmap(
+        os.path.join(tmp_dir, "int8_codes.npy"), mode="w+", dtype=np.uint8, shape=(count, dim)
+    )
+    binary_codes = np.lib.format.open_memmap(
+        os.path.join(tmp_dir, "binary_codes.npy"), mode="w+", dtype=np.uint8, shape=(count, (dim + 7) // 8)
+    )
+    int8_sq_norms = []
+    for i in range(0, count, SEARCH_BLOCK_ROWS):
+        block = vectors[i:i + SEARCH_BLOCK_ROWS]
+        codes = encode_int8(block, lo, step)
+        int8_codes[i:i + len(codes)] = codes
+        int8_sq_norms.append((decode_int8(codes, lo, step) ** 2).sum(axis=1))
+        binary_codes[i:i + len(codes)] = encode_binary(block, mean)
+    np.save(os.path.join(tmp_dir, "int8_params.npy"), np.stack([lo, step]))
+    np.save(os.path.join(tmp_dir, "int8_sq_norms.npy"), np.concatenate(int8_sq_norms).astype(np.float32))
+    np.save(os.path.join(tmp_dir, "binary_mean.npy"), mean)
+    quantization = {
+        "int8_mb": (int8_codes.nbytes + count * 4) / 2**20,
+        "binary_mb": binary_codes.nbytes / 2**20,
+    }
+    int8_codes.flush()
+    binary_codes.flush()
+    return quantization
+
+
+def _top_k(distances, k):
+    """
+    (index, distance) of the k smallest finite distances, closest first.
+    """
+    k = min(k, len(distances))
+    if k <= 0:
+        return []
+    rows = np.argpartition(distances, k - 1)[:k]
+    rows = rows[np.argsort(distances[rows])]
+    return [(int(row), float(distances[row])) for row in rows if np.isfinite(distances[row])]
+
+
+class _IndexFiles:
+    """
+    Memory-mapped arrays of one export. Searches read a single snapshot, so a
+    reload never mixes the files of two builds.
+    """
+
+    def __init__(self, index_dir, meta):
+        path = lambda name: os.path.join(index_dir, name)
+        self.meta = meta
+        self.vectors = np.load(path("vectors.npy"), mmap_mode="r")
+        self.sq_norms = np.load(path("sq_norms.npy"), mmap_mode="r")
+        self.category_codes = np.load(path("category_codes.npy"), mmap_mode="r")
+        self.offsets = np.load(path("offsets.npy"), mmap_mode="r")
+        with open(path("chunks.jsonl"), "rb") as f:
+            self.chunks = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.graph = None
+        self.int8_codes = self.binary_codes = None
+        if meta.get("quantization"):
+            self.int8_codes = np.load(path("int8_codes.npy"), mmap_mode="r")
+            self.int8_lo, self.int8_step = np.load(path("int8_params.npy"))
+            self.int8_sq_norms = np.load(path("int8_sq_norms.npy"), mmap_mode="r")
+            self.binary_codes = np.load(path("binary_codes.npy"), mmap_mode="r")
+            self.binary_mean = np.load(path("binary_mean.npy"))
+
+    def record(self, row):
+        return json.loads(self.chunks[int(self.offsets[row]):int(self.offsets[row + 1])])
+
+    def allowed_rows(self, categories):
+        codes = [i for i, c in enumerate(self.meta["categories"]) if c in categories]
+        return np.isin(self.category_codes, codes)
+
+
+class MmapVectorStore(VectorStore):
+    """
+    Read-only vector store over an export of export_vector_index. The matrix is
+    memory-mapped (instant load, pages shared by all processes on the host) and
+    searched exactly with NumPy; results match Chroma's squared L2 distances.
+    With quantization "int8" or "binary", the compressed codes are scanned instead
+    and only the best candidates are rescored against the full vectors.
+    """
+
+    def __init__(self, index_dir, embedding=None, quantization=VECTOR_QUANTIZATION):
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization {quantization!r}, expected one of {QUANTIZATION_MODES}")
+        self.index_dir = index_dir
+        self._embedding = embedding
+        self._lock = threading.Lock()
+        self._meta_mtime = None
+        self._files = self._load()
+        self.quantization = quantization
+        if quantization != "none" and self._files.int8_codes is None:
+            logger.warning(f"Index sans codes compressés dans {index_dir}, recherche exacte.")
+            self.quantization = "none"
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def _load(self):
+        self._meta_mtime = os.stat(os.path.join(self.index_dir, "meta.json")).st_mtime_ns
+        meta = _read_meta(self.index_dir)
+        if meta is None:
+            raise ValueError(f"Unsupported vector index in {self.index_dir}")
+        return _IndexFiles(self.index_dir, meta)
+
+    def _maybe_reload(self):
+        """
+        Picks up a new export (written by a rebuild) without restarting the process.
+        """
+        try:
+            mtime = os.stat(os.path.join(self.index_dir, "meta.json")).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._meta_mtime:
+            with self._lock:
+                if mtime != self._meta_mtime:
+                    self._files = self._load()
+                    logger.info(f"Index vectoriel rechargé ({self.count()} passages).")
+
+    def count(self):
+        return self._files.meta["count"]
+
+    def warm_up(self):
+        """
+        Reads the whole matrix once so that its pages are in the page cache.
+        """
+        vectors = self._files.vectors
+        for i in range(0, len(vectors), SEARCH_BLOCK_ROWS):
+            np.asarray(vectors[i:i + SEARCH_BLOCK_ROWS]).sum()
+        return self.count()
+
+    def _scan(self, files, query):
+        """
+        Distance of the query to every row (blockwise to bound memory): exact with
+        no quantization, approximate (int8) or Hamming (binary) otherwise.
+        """
+        blocks = range(0, files.meta["count"], SEARCH_BLOCK_ROWS)
+        if self.quantization == "int8":
+            return np.concatenate([
+                int8_distances(files.int8_codes[i:i + SEARCH_BLOCK_ROWS], files.int8_sq_norms[i:i + SEARCH_BLOCK_ROWS],
+                               files.int8_lo, files.int8_step, query)
+                for i in blocks
+            ])
+        if self.quantization == "binary":
+            query_code = encode_binary(query, files.binary_mean)
+            return np.concatenate([
+                hamming_distances(files.binary_codes[i:i + SEARCH_BLOCK_ROWS], query_code) for i in blocks
+            ]).astype(np.float32)
+        # ||x - q||² = ||x||² - 2 x.q + ||q||²
+        return np.concatenate([
+            files.sq_norms[i:i + SEARCH_BLOCK_ROWS]
+            - 2 * (files.vectors[i:i + SEARCH_BLOCK_ROWS].astype(np.float32) @ query)
+            for i in blocks
+        ]) + float(query @ query)
+
+    def _search(self, files, embedding, k, categories=None):
+        """
+        Top-k as (row, squared L2 distance), optionally restricted to categories.
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        distances = self._scan(files, query)
+        if categories:
+            distances[~files.allowed_rows(categories)] = np.inf
+        if self.quantization == "none":
+            return _top_k(distances, k)
+        factor = INT8_RESCORE_FACTOR if self.quantization == "int8" else BINARY_RESCORE_FACTOR
+        candidates = np.sort([row for row, _ in _top_k(distances, k * factor)])
+        if not len(candidates):
+            return []
+        # Rescoring: exact distances of the candidates only
+        exact = ((files.vectors[candidates].astype(np.float32) - query) ** 2).sum(axis=1)
+        return [(int(candidates[i]), float(exact[i])) for i, _ in _top_k(exact, k)]
+
+    def _query(self, embedding, k, categories=None):
+        """
+        Top-k as (record, distance), where a record is {"id", "text", "metadata"}.
+        """
+        self._maybe_reload()
+        files = self._files
+        return [(files.record(row), distance) for row, distance in self._search(files, embedding, k, categories)]
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k=4, categories=None, **kwargs):
+        return [
+            (Document(page_content=record["text"], metadata=record["metadata"]), distance)
+            for record, distance in self._query(embedding, k, categories)
+        ]
+
+    def similarity_search_by_vector(self, embedding, k=4, categories=None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_relevance_scores(embedding, k, categories)]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.similarity_search_by_vector_with_relevance_scores(self._embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k, **kwargs)
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError("Read-only index: rebuild it with build_vectorstore.")
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("Build the Chroma collection, then export it with export_vector_index.")
+
+
+class HnswVectorStore(MmapVectorStore):
+    """
+    Approximate search over an HNSW graph (hnswlib) built on the same export.
+    ef trades recall for latency at query time; M and ef_construction are fixed at export.
+    """
+
+    def __init__(self, index_dir, embedding=None, ef=HNSW_EF_SEARCH):
+        self.ef = ef
+        super().__init__(index_dir, embedding, quantization="none")
+
+    def _load(self):
+        import hnswlib
+        files = super()._load()
+        if not files.meta.get("hnsw"):
+            raise ValueError(f"No HNSW graph in {self.index_dir}")
+        files.graph = hnswlib.Index(space="l2", dim=files.meta["dim"])
+        files.graph.load_index(os.path.join(self.index_dir, "hnsw.bin"), max_elements=files.meta["count"])
+        files.graph.set_ef(self.ef)
+        return files
+
+    def set_ef(self, ef):
+        self.ef = ef
+        self._files.graph.set_ef(ef)
+
+    def warm_up(self):
+        return self.count()
+
+    def _search(self, files, embedding, k, categories=None):
+        query = np.asarray([embedding], dtype=np.float32)
+        allowed = files.allowed_rows(categories) if categories else None
+        k = min(k, files.meta["count"] if allowed is None else int(allowed.sum()))
+        if k <= 0:
+            return []
+        try:
+            rows, distances = files.graph.knn_query(
+                query, k=k, filter=None if allowed is None else (lambda row: bool(allowed[row]))
+            )
+        except RuntimeError:
+            # Too few filtered neighbours reachable with this ef: exact search on the subset
+            return super()._search(files, embedding, k, categories)
+        return [(int(row), float(distance)) for row, distance in zip(rows[0], distances[0])]
+
+
+def load_vector_index(backend, embedding=None, index_dir=VECTOR_INDEX_DIR, index_version=None):
+    """
+    Opens the exported index for backend ("mmap" or "hnsw"), or returns None if it
+    is missing, older than index_version, or cannot be read.
+    """
+    meta = _read_meta(index_dir)
+    if meta is None:
+        logger.warning(f"Aucun index vectoriel exporté dans {index_dir}.")
+        return None
+    if index_version is not None and not vector_index_is_current(index_dir, index_version, backend):
+        logger.warning(f"Index vectoriel {backend} périmé ou incomplet dans {index_dir}.")
+        return None
+    try:
+        store_class = HnswVectorStore if backend == "hnsw" else MmapVectorStore
+        store = store_class(index_dir, embedding)
+        logger.info(f"Index vectoriel {backend} chargé ({store.count()} passages).")
+        return store
+    except Exception as e:
+        logger.error(f"Erreur lors du chargement de l'index vectoriel {backend}: {e}")
+        return None
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def benchmark(collection, index_dir, queries, k=10, ef_values=(16, 64, 128), open_collection=None):
+    """
+    Load time, query latency, recall@k against exact float32 search and size of
+    the scanned data for Chroma, the memory-mapped index (float32, float16, int8
+    and binary codes with rescoring) and HNSW.
+    open_collection, if given, reopens the Chroma collection to time its load.
+    """
+    results = []
+    exact_dir = index_dir + "_f32"
+    export_vector_index(collection, exact_dir, dtype="float32")
+    export_vector_index(collection, index_dir, dtype="float16", hnsw=True)
+
+    def ids_of(store, query):
+        return [record["id"] for record, _ in store._query(query, k)]
+
+    exact = MmapVectorStore(exact_dir, quantization="none")
+    truth = [set(ids_of(exact, q)) for q in queries]
+
+    float32_bytes = exact._files.vectors.nbytes
+
+    def run(name, load, search, scanned_bytes=None):
+        t0 = time.perf_counter()
+        store = load()
+        load_ms = (time.perf_counter() - t0) * 1000
+        latencies, hits = [], 0
+        for query, expected in zip(queries, truth):
+            t0 = time.perf_counter()
+            found = search(store, query)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            hits += len(expected & set(found))
+        results.append({
+            "backend": name,
+            "load_ms": round(load_ms, 1),
+            "p50_ms": round(_percentile(latencies, 0.5), 3),
+            "p95_ms": round(_percentile(latencies, 0.95), 3),
+            f"recall@{k}": round(hits / (k * len(queries)), 4),
+            "index_mb": round(scanned_bytes / 2**20, 2) if scanned_bytes else None,
+            "saved": f"{1 - scanned_bytes / float32_bytes:.0%}" if scanned_bytes else None,
+        })
+        return store
+
+    run("chroma", open_collection or (lambda: collection),
+        lambda c, q: c.query(query_embeddings=[q.tolist()], n_results=k, include=[])["ids"][0])
+    run("mmap-f32", lambda: MmapVectorStore(exact_dir, quantization="none"), ids_of, float32_bytes)
+    run("mmap-f16", lambda: MmapVectorStore(index_dir, quantization="none"), ids_of, float32_bytes // 2)
+    files = exact._files
+    run("mmap-int8", lambda: MmapVectorStore(exact_dir, quantization="int8"), ids_of,
+        files.int8_codes.nbytes + files.int8_sq_norms.nbytes)
+    run("mmap-binary", lambda: MmapVectorStore(exact_dir, quantization="binary"), ids_of, files.binary_codes.nbytes)
+    for ef in ef_values:
+        run(f"hnsw-ef{ef}", lambda: HnswVectorStore(index_dir, ef=ef), ids_of,
+            os.path.getsize(os.path.join(index_dir, "hnsw.bin")))
+    shutil.rmtree(exact_dir, ignore_errors=True)
+    return results
+
+
+def sample_queries(collection, n, noise=0.05, seed=0):
+    """
+    Query vectors near the corpus: stored vectors of random chunks plus Gaussian noise
+    (no embedding model needed).
+    """
+    count = collection.count()
+    rng = np.random.default_rng(seed)
+    queries = []
+    for offset in rng.choice(count, size=min(n, count), replace=False):
+        vector = np.asarray(collection.get(include=["embeddings"], limit=1, offset=int(offset))["embeddings"][0],
+                            dtype=np.float32)
+        queries.append(vector + rng.normal(0, noise * vector.std(), vector.shape).astype(np.float32))
+    return queries
+
+
+if __name__ == "__main__":
+    from langchain_community.vectorstores import Chroma
+    from src.build_vectorstore import DB_DIR, get_index_version
+
+    parser = argparse.ArgumentParser(description="Memory-mapped / HNSW vector index tools")
+    parser.add_argument("command", choices=["export", "bench"])
+    parser.add_argument("--backend", choices=["mmap", "hnsw"], default=VECTOR_INDEX_BACKEND
+                        if VECTOR_INDEX_BACKEND in ("mmap", "hnsw") else "mmap")
+    parser.add_argument("--queries", type=int, default=200, help="Queries for bench")
+    parser.add_argument("--k", type=int, default=10, help="k for recall@k in bench")
+    args = parser.parse_args()
+
+    collection = Chroma(persist_directory=DB_DIR)._collection
+    if args.command == "export":
+        export_vector_index(collection, VECTOR_INDEX_DIR, hnsw=args.backend == "hnsw",
+                            index_version=get_index_version())
+    else:
+        rows = benchmark(
+            collection, VECTOR_INDEX_DIR + "_bench", sample_queries(collection, args.queries), k=args.k,
+            open_collection=lambda: Chroma(persist_directory=DB_DIR)._collection
+        )
+        shutil.rmtree(VECTOR_INDEX_DIR + "_bench", ignore_errors=True)
+        columns = list(rows[0].keys())
+        print("".join(f"{c:>12}" for c in columns))
+        for row in rows:
+            print("".join(f"{'-' if row[c] is None else row[c]:>12}" for c in columns))
@@ -0,0 +1,65 @@
+import numpy as np
+
+# Compressed codes scanned at query time instead of the float vectors:
+# - int8: per-dimension scalar quantization to 256 levels (4x smaller than float32)
+# - binary: 1 bit per dimension, sign around the per-dimension mean (32x smaller),
+#   compared with the Hamming distance
+# Candidates found on the codes are rescored against the full-precision vectors.
+
+QUANTIZATION_MODES = ("none", "int8", "binary")
+
+# Popcount of every byte value, for numpy versions without np.bitwise_count
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def fit_int8(vectors, block_rows):
+    """
+    Per-dimension (minimum, step) mapping float values onto 0..255.
+    """
+    lo = np.full(vectors.shape[1], np.inf, dtype=np.float32)
+    hi = np.full(vectors.shape[1], -np.inf, dtype=np.float32)
+    for i in range(0, len(vectors), block_rows):
+        block = np.asarray(vectors[i:i + block_rows], dtype=np.float32)
+        lo = np.minimum(lo, block.min(axis=0))
+        hi = np.maximum(hi, block.max(axis=0))
+    step = np.maximum(hi - lo, 1e-12) / 255
+    return lo, step.astype(np.float32)
+
+
+def encode_int8(block, lo, step):
+    codes = np.rint((np.asarray(block, dtype=np.float32) - lo) / step)
+    return np.clip(codes, 0, 255).astype(np.uint8)
+
+
+def decode_int8(codes, lo, step):
+    return lo + codes.astype(np.float32) * step
+
+
+def int8_distances(codes, sq_norms, lo, step, query):
+    """
+    Squared L2 distances (up to the constant ||q||²) between query and the
+    decoded vectors lo + step * codes, without decoding them:
+    ||x||² - 2 q.x = ||x||² - 2 (q.lo + (q * step).codes).
+    """
+    return sq_norms - 2 * (float(query @ lo) + codes.astype(np.float32) @ (query * step))
+
+
+def fit_binary(vectors, block_rows):
+    """
+    Per-dimension mean used as the bit threshold.
+    """
+    total = np.zeros(vectors.shape[1], dtype=np.float64)
+    for i in range(0, len(vectors), block_rows):
+        total += np.asarray(vectors[i:i + block_rows], dtype=np.float64).sum(axis=0)
+    return (total / max(1, len(vectors))).astype(np.float32)
+
+
+def encode_binary(block, mean):
+    return np.packbits(np.asarray(block, dtype=np.float32) > mean, axis=-1)
+
+
+def hamming_distances(codes, query_code):
+    diff = np.bitwise_xor(codes, query_code)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(diff).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[diff].sum(axis=1, dtype=np.int32)
@@ -0,0 +1,107 @@
+import os
+import time
+import logging
+import importlib
+import threading
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Préchauffage au démarrage du processus : modèle d'embedding, base vectorielle,
+# index BM25 et chaîne RAG sont chargés dans un thread d'arrière-plan pendant
+# que la page de connexion s'affiche. query_rag attend ensuite que tout soit prêt.
+
+# Attente maximale d'une requête sur le préchauffage (secondes)
+WARMUP_TIMEOUT = int(os.getenv("WARMUP_TIMEOUT", "300"))
+
+_ready = threading.Event()
+_start_lock = threading.Lock()
+_thread = None
+_state = {"status": "idle", "vectorstore": None, "error": None, "timings_ms": {}}
+
+
+def _timed(step, fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    _state["timings_ms"][step] = round((time.perf_counter() - t0) * 1000, 1)
+    return result
+
+
+def _warm_up():
+    t0 = time.perf_counter()
+    try:
+        # Imports lourds (LangChain, Chroma, torch) faits ici plutôt qu'au premier message
+        _timed("imports", importlib.import_module, "src.rag_chain")
+        from src.build_vectorstore import get_vectorstore, get_bm25_index
+        from src.rag_chain import RERANK_ENABLED, HYBRID_RETRIEVAL
+
+        vectorstore = _timed("vectorstore", get_vectorstore)
+        if vectorstore is None:
+            raise RuntimeError("base vectorielle indisponible")
+        # Un premier embedding déclenche les initialisations paresseuses (tokenizer, poids, threads) ;
+        # on appelle le modèle lui-même, le cache d'embeddings pourrait déjà connaître ce texte
+        model = getattr(vectorstore.embeddings, "embeddings", vectorstore.embeddings)
+        _timed("embedding", model.embed_query, "préchauffage")
+        # Ouvre la base SQLite de Chroma, ou charge en mémoire les pages de l'index mmap
+        _timed("collection", getattr(vectorstore, "warm_up", None) or vectorstore._collection.count)
+        if HYBRID_RETRIEVAL:
+            _timed("bm25", get_bm25_index)
+        if RERANK_ENABLED:
+            from src.reranker import get_reranker
+            _timed("reranker", get_reranker)
+
+        _state["vectorstore"] = vectorstore
+        _state["status"] = "ready"
+        total_s = time.perf_counter() - t0
+        logger.info(f"Préchauffage terminé en {total_s:.1f} s ({_state['timings_ms']}).")
+    except Exception as e:
+        _state["status"] = "failed"
+        _state["error"] = str(e)
+        logger.error(f"Échec du préchauffage : {e}")
+    finally:
+        _ready.set()
+
+
+def start_warmup():
+    """Lance le préchauffage en arrière-plan (une seule fois par processus)."""
+    global _thread
+    with _start_lock:
+        if _thread is None:
+            _state["status"] = "loading"
+            _thread = threading.Thread(target=_warm_up, name="rag-warmup", daemon=True)
+            _thread.start()
+    return _thread
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def wait_until_ready(timeout=WARMUP_TIMEOUT):
+    """
+    Attend la fin du préchauffage (en le lançant si besoin) et retourne la base
+    vectorielle, ou None si elle n'a pas pu être chargée.
+    """
+    start_warmup()
+    if not _ready.wait(timeout):
+        logger.error(f"Préchauffage non terminé après {timeout} s.")
+        return None
+    return _state["vectorstore"]
+
+
+def replace_vectorstore(reopen):
+    """
+    Remplace la base vectorielle préchauffée par reopen(base actuelle), après une
+    reconstruction de l'index. Sans effet si le préchauffage n'a pas abouti.
+    """
+    if _state["vectorstore"] is not None:
+        _state["vectorstore"] = reopen(_state["vectorstore"])
+
+
+def get_warmup_status():
+    """État du préchauffage pour les diagnostics (statut, erreur, durée de chaque étape)."""
+    return {
+        "status": _state["status"],
+        "error": _state["error"],
+        "timings_ms": dict(_state["timings_ms"]),
+    }
@@ -1,14 +1,101 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+import re
 import time
+import hashlib
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin, urlparse
+from utils.http_cache import HttpCache, sha256_bytes
+
+# Politeness: minimum seconds between two requests to the same host (token bucket
+# refilled at 1/HOST_DELAY token per second, holding at most HOST_BURST tokens)
+HOST_DELAY = 1
+HOST_BURST = 1
+# Requests in flight at once, all hosts together
+MAX_CONCURRENT_REQUESTS = 8
+# Pooled keep-alive connections kept per host
+MAX_CONNECTIONS_PER_HOST = 4
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+# Shared by every crawler (and thread), so limits hold across scrapers
+_host_buckets = {}
+_host_buckets_lock = threading.Lock()
+_request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+_shared_session = None
+_session_lock = threading.Lock()
+
+def host_bucket(url, delay=HOST_DELAY):
+    host = urlparse(url).netloc.lower()
+    with _host_buckets_lock:
+        if host not in _host_buckets:
+            _host_buckets[host] = TokenBucket(1 / delay if delay > 0 else float("inf"), HOST_BURST)
+        return _host_buckets[host]
+
+def shared_session():
+    """
+    One requests session for all crawlers, pooling up to MAX_CONNECTIONS_PER_HOST
+    keep-alive connections per host.
+    """
+    global _shared_session
+    with _session_lock:
+        if _shared_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=MAX_CONNECTIONS_PER_HOST, pool_block=True)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _shared_session = session
+        return _shared_session
+
+def _cached_response(url, entry, body):
+    """
+    Rebuilds the response of a 304 Not Modified answer from the cached body.
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = body
+    response.encoding = entry.get("encoding")
+    if entry.get("content_type"):
+        response.headers["Content-Type"] = entry["content_type"]
+    return response
 
 class BaseCrawler:
-    def __init__(self, base_url=None):
+    def __init__(self, base_url=None, use_cache=True):
+        """
+        use_cache=False ignores the HTTP cache when fetching (every source is
+        reported as changed) but still refreshes it.
+        """
         self.base_url = base_url
-        self.session = requests.Session()
+        self.session = shared_session()
+        self.use_cache = use_cache
+        self.http_cache = HttpCache()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -26,32 +113,96 @@ class BaseCrawler:
         )
         self.logger = logging.getLogger(__name__)
 
-    def fetch(self, url, delay=1):
+    def _get(self, url, delay=HOST_DELAY, headers=None, **kwargs):
+        """
+        GET respecting the per-host rate and the global concurrency limit.
         """
-        Fetches the content of a URL with a delay to respect server load.
+        host_bucket(url, delay).acquire()
+        with _request_slots:
+            return self.session.get(url, headers={**self.headers, **(headers or {})}, **kwargs)
+
+    def fetch(self, url, delay=HOST_DELAY):
+        """
+        Fetches the content of a URL. Requests to the same host are spaced by
+        `delay` seconds to respect server load; other hosts are not delayed.
+
+        The request is conditional when the URL is in the HTTP cache: a 304 Not
+        Modified is answered from the cache. response.changed tells whether the
+        content differs from the previous fetch, response.from_cache whether the
+        body was served from the cache. A new body enters the cache only through
+        commit(), once the scraper has written its output.
         """
         try:
-            time.sleep(delay)
-            response = self.session.get(url, headers=self.headers, timeout=30)
+            entry = self.http_cache.get(url) if self.use_cache else None
+            response = self._get(url, delay, headers=HttpCache.conditional_headers(entry), timeout=30)
+            if response.status_code == 304 and entry is not None:
+                response = _cached_response(url, entry, self.http_cache.load_body(url))
+                response.from_cache, response.changed = True, False
+                self.logger.info(f"Not modified (served from cache): {url}")
+                return response
             response.raise_for_status()
+            response.cache_key = url
+            response.from_cache = False
+            response.changed = entry is None or entry.get("sha256") != sha256_bytes(response.content)
             self.logger.info(f"Successfully fetched: {url}")
             return response
         except Exception as e:
             self.logger.error(f"Failed to fetch {url}: {e}")
             return None
 
+    def commit(self, response):
+        """
+        Records a fetched page in the HTTP cache. Scrapers call it after writing
+        the page output: if parsing or saving fails, the page is still reported
+        as changed on the next run.
+        """
+        if response is not None and not response.from_cache:
+            self.http_cache.store(response.cache_key, response)
+
+    def fetch_many(self, urls, delay=HOST_DELAY):
+        """
+        Fetches several URLs concurrently and returns their responses (None on
+        failure) in the order of urls.
+        """
+        urls = list(urls)
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(urls), MAX_CONCURRENT_REQUESTS)) as pool:
+            return list(pool.map(lambda url: self.fetch(url, delay), urls))
+
+    def soup_from(self, response):
+        return BeautifulSoup(response.text, 'lxml') if response else None
+
     def get_soup(self, url):
         """
         Fetches a URL and returns a BeautifulSoup object.
+        The page is not committed to the HTTP cache (see commit()): callers that
+        save an output should use fetch() and commit() once it is written.
         """
         response = self.fetch(url)
         if response:
             return BeautifulSoup(response.text, 'lxml')
         return None
 
-    def download_file(self, url, folder, filename=None):
+    def is_unchanged(self, response, *output_paths):
+        """
+        True when a fetched source did not change and its outputs still exist,
+        so parsing and saving it again can be skipped (its cache entry is then
+        committed, to keep the new validators).
+        """
+        if response is None or response.changed:
+            return False
+        if all(os.path.exists(path) for path in output_paths):
+            self.commit(response)
+            self.logger.info(f"Unchanged, skipped: {response.url}")
+            return True
+        return False
+
+    def download_file(self, url, folder, filename=None, return_changed=False):
         """
         Downloads a file from a URL to a specific folder.
+        The download is conditional when the file is in the HTTP cache (a 304
+        keeps the existing file). With return_changed=True, returns (path, changed).
         """
         if not os.path.exists(folder):
             os.makedirs(folder)
@@ -62,17 +213,34 @@ class BaseCrawler:
         # Clean filename
         filename = re.sub(r'[^\w\-_\.]', '_', filename)
         path = os.path.join(folder, filename)
+        tmp_path = path + ".part"
         
         try:
-            response = self.session.get(url, headers=self.headers, stream=True, timeout=60)
-            response.raise_for_status()
-            with open(path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            entry = self.http_cache.get(url) if self.use_cache else None
+            if entry is not None and entry.get("file") != os.path.abspath(path):
+                entry = None
+            host_bucket(url).acquire()
+            # The request slot is held for the whole transfer, not just the headers
+            with _request_slots:
+                headers = {**self.headers, **HttpCache.conditional_headers(entry)}
+                response = self.session.get(url, headers=headers, stream=True, timeout=60)
+                if response.status_code == 304 and entry is not None:
+                    response.close()
+                    self.logger.info(f"Not modified, kept {path}: {url}")
+                    return (path, False) if return_changed else path
+                response.raise_for_status()
+                digest = hashlib.sha256()
+                with open(tmp_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=8192):
+                        f.write(chunk)
+                        digest.update(chunk)
+                os.replace(tmp_path, path)
+            self.http_cache.store_file(url, response, path, digest.hexdigest())
+            changed = entry is None or entry.get("sha256") != digest.hexdigest()
             self.logger.info(f"Downloaded file: {url} to {path}")
-            return path
+            return (path, changed) if return_changed else path
         except Exception as e:
             self.logger.error(f"Failed to download {url}: {e}")
-            return None
-
-import re # Added missing import
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return (None, False) if return_changed else None
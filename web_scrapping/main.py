@@ -1,14 +1,37 @@
 import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
 from scrapers.news_scrapers import NewsScraper
 from scrapers.weather_scrapers import WeatherScraper
 from scrapers.stats_scrapers import StatsScraper
 from scrapers.geo_scraper import GeoScraper
-from utils.metadata import initialize_metadata
+from utils.metadata import initialize_metadata, export_metadata_json, write_collection_stats
 import logging
 
+def run_concurrently(jobs):
+    """
+    Runs each job (a list of scraper methods, called in order) in its own thread.
+    The scrapers hit different hosts, so the crawl takes about as long as the
+    slowest job; per-host politeness is enforced by the crawler (see crawler.py).
+    """
+    def run(job):
+        for method in job:
+            try:
+                method()
+            except Exception as e:
+                logging.error(f"{method.__qualname__} failed: {e}")
+                print(f"Error in {method.__qualname__}: {e}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        list(pool.map(run, jobs))
+    print(f"Scraping took {time.perf_counter() - start:.1f}s.")
+
 def main():
     parser = argparse.ArgumentParser(description="Tèwou Agro-Assistant Data Scraper")
     parser.add_argument("--test", action="store_true", help="Run a quick test scrape")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignore the HTTP cache and re-process every source")
     args = parser.parse_args()
 
     # Initialize metadata file
@@ -17,50 +40,37 @@ def main():
     # Setup logging
     logging.info("Starting Tèwou Agro-Assistant Data Scraper")
 
+    # Unchanged sources (HTTP 304 or identical content) are skipped unless --refresh
+    use_cache = not args.refresh
+    news = NewsScraper(use_cache=use_cache)
+    weather = WeatherScraper(use_cache=use_cache)
+    stats = StatsScraper(use_cache=use_cache)
+    geo = GeoScraper(use_cache=use_cache)
+
     if args.test:
         print("Starting test scrape...")
-        
-        # Test News Scrapers
-        news = NewsScraper()
-        print("Scraping Mbeymi...")
-        news.scrape_mbeymi()
-        
-        # Test Weather Scrapers
-        weather = WeatherScraper()
-        print("Scraping Au-Senegal...")
-        weather.scrape_au_senegal()
-        
-        # Test Stats Scrapers (limited)
-        stats = StatsScraper()
-        print("Scraping FAO stats...")
-        stats.scrape_fao()
-        
-        # Test Geo Scrapers (limited)
-        geo = GeoScraper()
-        print("Scraping FAO Soils...")
-        geo.scrape_fao_soils()
-        
+        # Mbeymi, Au-Senegal, FAO stats and FAO Soils (limited)
+        run_concurrently([
+            [news.scrape_mbeymi],
+            [weather.scrape_au_senegal],
+            [stats.scrape_fao],
+            [geo.scrape_fao_soils],
+        ])
         print("Test scrape completed! Check data_collection/ for results.")
     else:
         print("Running full scraping pipeline...")
-        
-        news = NewsScraper()
-        news.scrape_mbeymi()
-        news.scrape_agropasteur()
-        
-        weather = WeatherScraper()
-        weather.scrape_au_senegal()
-        weather.scrape_donnees_mondiales()
-        
-        stats = StatsScraper()
-        stats.scrape_world_bank()
-        stats.scrape_fao()
-        
-        geo = GeoScraper()
-        geo.scrape_geosenegal()
-        geo.scrape_fao_soils()
-        
+        run_concurrently([
+            [news.scrape_mbeymi, news.scrape_agropasteur],
+            [weather.scrape_au_senegal, weather.scrape_donnees_mondiales],
+            [stats.scrape_world_bank, stats.scrape_fao],
+            [geo.scrape_geosenegal, geo.scrape_fao_soils],
+        ])
         print("Full scrape completed!")
 
+    # Snapshot of the metadata store for the readers of metadata.json, and
+    # corpus statistics for the assistant's sidebar
+    print(f"metadata.json updated ({export_metadata_json()} records).")
+    write_collection_stats()
+
 if __name__ == "__main__":
     main()
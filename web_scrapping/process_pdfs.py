@@ -1,48 +1,139 @@
 import os
 import json
-from utils.pdf_extractor import extract_text_from_pdf, save_extracted_text
-from utils.metadata import add_metadata
+import argparse
+from utils.pdf_extractor import (
+    extract_text_from_pdf, save_extracted_text, extract_pdfs_parallel, ThroughputMeter, EXTRACTOR_VERSION
+)
+from utils.extraction_manifest import ExtractionManifest
+from utils.metadata import add_metadata, get_all_metadata, export_metadata_json, write_collection_stats
 
-def process_existing_pdfs():
+def _save_pdf_text(pdf_file, pdf_path, text, extracted_dir, known_sources):
+    """
+    Writes the extracted text and returns True, or False if the PDF has no text.
+    """
+    if text.strip():
+        save_extracted_text(text, pdf_file, extracted_dir)
+
+        # Add to metadata if not already there
+        source_url = f"local://raw_pdfs/{pdf_file}"
+        if source_url in known_sources:
+            return True
+        known_sources.add(source_url)
+        add_metadata({
+            "source_url": source_url,
+            "file_type": "pdf",
+            "content": f"extracted_text/{pdf_file}.txt",
+            "metadata": {
+                "title": pdf_file.replace(".pdf", "").replace("_", " "),
+                "date": "N/A",
+                "language": "fr", # Defaulting to fr for now
+                "category": "document_local",
+                "region": "Sénégal",
+                "file_size": f"{os.path.getsize(pdf_path)/1024:.2f} KB"
+            }
+        })
+        return True
+    print(f"Warning: No text extracted from {pdf_file}")
+    return False
+
+def _plan_extraction(manifest, raw_dir, extracted_dir, pdf_files):
+    """
+    Returns {content key: PDF file to extract it from} for new or changed content.
+    Unchanged PDFs are recognized from their size and mtime, without being read;
+    byte-identical PDFs under different names are extracted only once.
+    """
+    to_extract = {}
+    unchanged = duplicates = 0
+    keys = {}
+    for pdf_file in pdf_files:
+        try:
+            keys[pdf_file] = manifest.content_key(pdf_file, os.path.join(raw_dir, pdf_file))
+        except OSError as e:
+            print(f"Error processing {pdf_file}: {e}")
+    # Content whose text was saved under the name of a PDF that changed or disappeared
+    orphans = manifest.orphaned(list(keys))
+    for pdf_file, key in keys.items():
+        if key in to_extract:
+            duplicates += 1
+        elif key in orphans:
+            # Extracted again under its own name: counted as an extraction only
+            to_extract[key] = pdf_file
+        elif manifest.is_extracted(key, extracted_dir):
+            if manifest.owner(key) == pdf_file:
+                unchanged += 1
+            else:
+                duplicates += 1
+        else:
+            to_extract[key] = pdf_file
+    manifest.prune(pdf_files)
+    print(f"{len(to_extract)} new or changed PDF(s) to extract, {unchanged} unchanged, "
+          f"{duplicates} duplicate(s) of another PDF skipped.")
+    return to_extract
+
+def process_existing_pdfs(workers=1):
+    """
+    Extracts the text of the new or changed PDFs in raw_pdfs (see _plan_extraction);
+    the text and metadata of unchanged PDFs are left untouched, so they are not
+    re-chunked by the next incremental build. With workers > 1, pages are
+    extracted in parallel by a process pool (see extract_pdfs_parallel).
+    """
     raw_dir = os.path.join("data_collection", "raw_pdfs")
     extracted_dir = os.path.join("data_collection", "extracted_text")
-    
+
     if not os.path.exists(raw_dir):
         print(f"Directory {raw_dir} not found.")
         return
 
-    pdf_files = [f for f in os.listdir(raw_dir) if f.lower().endswith(".pdf")]
+    pdf_files = sorted(f for f in os.listdir(raw_dir) if f.lower().endswith(".pdf"))
     print(f"Found {len(pdf_files)} PDFs to process.")
+    manifest = ExtractionManifest(EXTRACTOR_VERSION)
+    to_extract = _plan_extraction(manifest, raw_dir, extracted_dir, pdf_files)
+    keys = {pdf_file: key for key, pdf_file in to_extract.items()}
+    known_sources = {entry.get("source_url") for entry in get_all_metadata()}
+    meter = ThroughputMeter()
 
-    for i, pdf_file in enumerate(pdf_files):
-        pdf_path = os.path.join(raw_dir, pdf_file)
-        print(f"[{i+1}/{len(pdf_files)}] Extracting: {pdf_file}")
-        
-        try:
-            text = extract_text_from_pdf(pdf_path)
-            if text.strip():
-                save_extracted_text(text, pdf_file, extracted_dir)
-                
-                # Add to metadata if not already there
-                add_metadata({
-                    "source_url": f"local://raw_pdfs/{pdf_file}",
-                    "file_type": "pdf",
-                    "content": f"extracted_text/{pdf_file}.txt",
-                    "metadata": {
-                        "title": pdf_file.replace(".pdf", "").replace("_", " "),
-                        "date": "N/A",
-                        "language": "fr", # Defaulting to fr for now
-                        "category": "document_local",
-                        "region": "Sénégal",
-                        "file_size": f"{os.path.getsize(pdf_path)/1024:.2f} KB"
-                    }
-                })
-            else:
-                print(f"Warning: No text extracted from {pdf_file}")
-        except Exception as e:
-            print(f"Error processing {pdf_file}: {e}")
+    def save(pdf_file, pdf_path, text, pages):
+        has_text = _save_pdf_text(pdf_file, pdf_path, text, extracted_dir, known_sources)
+        manifest.record_content(keys[pdf_file], pdf_file, pages, has_text)
+
+    try:
+        if workers > 1 and keys:
+            print(f"Extracting with {workers} worker processes...")
+            paths = {os.path.join(raw_dir, pdf_file): pdf_file for pdf_file in keys}
+            results = extract_pdfs_parallel(list(paths), workers=workers)
+            for i, (pdf_path, text, pages, error) in enumerate(results):
+                pdf_file = paths[pdf_path]
+                if error is not None:
+                    print(f"Error processing {pdf_file}: {error}")
+                    continue
+                meter.add(pages)
+                print(f"[{i+1}/{len(keys)}] Extracted: {pdf_file} ({pages} pages, {meter.rate():.1f} pages/s)")
+                try:
+                    save(pdf_file, pdf_path, text, pages)
+                except Exception as e:
+                    print(f"Error processing {pdf_file}: {e}")
+        else:
+            for i, pdf_file in enumerate(keys):
+                pdf_path = os.path.join(raw_dir, pdf_file)
+                print(f"[{i+1}/{len(keys)}] Extracting: {pdf_file}")
+
+                try:
+                    text, pages = extract_text_from_pdf(pdf_path, return_page_count=True)
+                    meter.add(pages)
+                    save(pdf_file, pdf_path, text, pages)
+                except Exception as e:
+                    print(f"Error processing {pdf_file}: {e}")
+    finally:
+        manifest.save()
+    if keys:
+        print(f"metadata.json updated ({export_metadata_json()} records).")
+        write_collection_stats()
 
-    print("PDF processing completed.")
+    print(f"PDF processing completed: {meter.summary()}.")
 
 if __name__ == "__main__":
-    process_existing_pdfs()
+    parser = argparse.ArgumentParser(description="Extract the text of the PDFs in data_collection/raw_pdfs")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Extraction processes (0 = one per CPU core)")
+    args = parser.parse_args()
+    process_existing_pdfs(workers=args.workers if args.workers > 0 else (os.cpu_count() or 1))
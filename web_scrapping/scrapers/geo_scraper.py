@@ -1,4 +1,5 @@
 from crawler import BaseCrawler
+from urllib.parse import urljoin
 from utils.metadata import add_metadata
 import os
 import json
@@ -12,9 +13,14 @@ class GeoScraper(BaseCrawler):
             "https://www.geosenegal.gouv.sn/-donnees-vectorielles-d-occupation-du-sol-.html"
         ]
         
-        for url in urls:
+        # Pages are fetched concurrently (still spaced per host), then parsed in order
+        for url, response in zip(urls, self.fetch_many(urls)):
             self.logger.info(f"Targeting Géo Sénégal: {url}")
-            soup = self.get_soup(url)
+            filename = f"geosenegal_{url.split('/')[-1].replace('.html', '')}.json"
+            output_path = os.path.join("data_collection", "web_content", filename)
+            # Linked GIS files may change behind an unchanged page: parse it anyway
+            page_unchanged = self.is_unchanged(response, output_path)
+            soup = self.soup_from(response)
             if not soup:
                 continue
                 
@@ -30,8 +36,10 @@ class GeoScraper(BaseCrawler):
                 if any(href.lower().endswith(ext) for ext in gis_extensions):
                     file_url = urljoin(url, href)
                     self.logger.info(f"Found GIS/Data file: {file_url}")
-                    file_path = self.download_file(file_url, os.path.join("data_collection", "structured_data"))
-                    if file_path:
+                    file_path, changed = self.download_file(
+                        file_url, os.path.join("data_collection", "structured_data"), return_changed=True
+                    )
+                    if file_path and changed:
                         add_metadata({
                             "source_url": file_url,
                             "file_type": file_path.split('.')[-1],
@@ -46,10 +54,10 @@ class GeoScraper(BaseCrawler):
                             }
                         })
             
+            if page_unchanged:
+                continue
+
             # Save page content
-            filename = f"geosenegal_{url.split('/')[-1].replace('.html', '')}.json"
-            output_path = os.path.join("data_collection", "web_content", filename)
-            
             data = {
                 "source_url": url,
                 "file_type": "html",
@@ -66,13 +74,16 @@ class GeoScraper(BaseCrawler):
             with open(output_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=4, ensure_ascii=False)
             add_metadata(data)
+            self.commit(response)
 
     def scrape_fao_soils(self):
         url = "https://www.fao.org/4/y3948f/y3948f07.htm"
         self.logger.info(f"Scraping FAO Soils: {url}")
-        soup = self.get_soup(url)
-        if not soup:
+        output_path = os.path.join("data_collection", "web_content", "fao_soils_senegal.json")
+        response = self.fetch(url)
+        if not response or self.is_unchanged(response, output_path):
             return
+        soup = self.soup_from(response)
             
         title = "Cartographie des sols FAO - Sénégal"
         content = soup.get_text()
@@ -91,8 +102,7 @@ class GeoScraper(BaseCrawler):
             }
         }
         
-        filename = "fao_soils_senegal.json"
-        output_path = os.path.join("data_collection", "web_content", filename)
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
         add_metadata(data)
+        self.commit(response)
@@ -7,9 +7,11 @@ class NewsScraper(BaseCrawler):
     def scrape_mbeymi(self):
         url = "https://www.mbeymi.com/article/9635-chiffres-agriculture-senegal.html"
         self.logger.info(f"Scraping Mbeymi: {url}")
-        soup = self.get_soup(url)
-        if not soup:
+        output_path = os.path.join("data_collection", "web_content", "mbeymi_chiffres_agriculture.json")
+        response = self.fetch(url)
+        if not response or self.is_unchanged(response, output_path):
             return
+        soup = self.soup_from(response)
         
         # Extract title
         title = soup.find('h1')
@@ -25,10 +27,6 @@ class NewsScraper(BaseCrawler):
             paragraphs = soup.find_all('p')
             content = clean_text(" ".join([p.get_text() for p in paragraphs]))
             
-        # Save content
-        filename = "mbeymi_chiffres_agriculture.json"
-        output_path = os.path.join("data_collection", "web_content", filename)
-        
         data = {
             "source_url": url,
             "file_type": "html",
@@ -48,14 +46,17 @@ class NewsScraper(BaseCrawler):
             json.dump(data, f, indent=4, ensure_ascii=False)
             
         add_metadata(data)
+        self.commit(response)
         self.logger.info(f"Mbeymi scrape completed and metadata added.")
 
     def scrape_agropasteur(self):
         url = "https://agropasteur.com/lagriculture-intelligente-face-au-climat-du-senegal-lharmonisation-des-initiatives-en-cours-lelaboration-dun-plan-dinvestissement-aic-consensuel-pour-le-sene/"
         self.logger.info(f"Scraping Agropasteur: {url}")
-        soup = self.get_soup(url)
-        if not soup:
+        output_path = os.path.join("data_collection", "web_content", "agropasteur_aic.json")
+        response = self.fetch(url)
+        if not response or self.is_unchanged(response, output_path):
             return
+        soup = self.soup_from(response)
             
         title = soup.find('h1')
         title_text = title.get_text(strip=True) if title else "Agriculture Intelligente Sénégal"
@@ -79,12 +80,10 @@ class NewsScraper(BaseCrawler):
             }
         }
         
-        filename = "agropasteur_aic.json"
-        output_path = os.path.join("data_collection", "web_content", filename)
-        
         import json
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
             
         add_metadata(data)
+        self.commit(response)
         self.logger.info(f"Agropasteur scrape completed.")
@@ -1,4 +1,5 @@
 from crawler import BaseCrawler
+from urllib.parse import urljoin
 from utils.metadata import add_metadata
 from utils.pdf_extractor import extract_text_from_pdf, save_extracted_text
 import os
@@ -12,11 +13,17 @@ class StatsScraper(BaseCrawler):
             "https://microdata.worldbank.org/index.php/catalog/6386/data-dictionary/F59"
         ]
         
-        for url in urls:
+        # Pages are fetched concurrently (still spaced per host), then parsed in order
+        for url, response in zip(urls, self.fetch_many(urls)):
             self.logger.info(f"Targeting World Bank: {url}")
             # Note: Microdata catalog often requires login or JS to download
             # For now, we scrape the page content and look for PDF/CSV links
-            soup = self.get_soup(url)
+            filename = f"wb_{url.split('/')[-2]}_{url.split('/')[-1]}.json"
+            output_path = os.path.join("data_collection", "web_content", filename)
+            # An unchanged page is still parsed: the files it links to are revalidated
+            # on their own, only its output is not rewritten
+            page_unchanged = self.is_unchanged(response, output_path)
+            soup = self.soup_from(response)
             if not soup:
                 continue
             
@@ -29,8 +36,14 @@ class StatsScraper(BaseCrawler):
                 if href.endswith('.pdf'):
                     pdf_url = urljoin(url, href)
                     self.logger.info(f"Found PDF: {pdf_url}")
-                    pdf_path = self.download_file(pdf_url, os.path.join("data_collection", "raw_pdfs"))
-                    if pdf_path:
+                    pdf_path, changed = self.download_file(
+                        pdf_url, os.path.join("data_collection", "raw_pdfs"), return_changed=True
+                    )
+                    if not pdf_path:
+                        continue
+                    # Unchanged PDF already extracted: no extraction, no metadata update
+                    text_path = os.path.join("data_collection", "extracted_text", f"{os.path.basename(pdf_path)}.txt")
+                    if changed or not os.path.exists(text_path):
                         text = extract_text_from_pdf(pdf_path)
                         save_extracted_text(text, os.path.basename(pdf_path))
                         
@@ -48,10 +61,11 @@ class StatsScraper(BaseCrawler):
                             }
                         })
             
+            if page_unchanged:
+                continue
+
             # Save page content
             content = soup.get_text()
-            filename = f"wb_{url.split('/')[-2]}_{url.split('/')[-1]}.json"
-            output_path = os.path.join("data_collection", "web_content", filename)
             
             data = {
                 "source_url": url,
@@ -69,13 +83,16 @@ class StatsScraper(BaseCrawler):
             with open(output_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=4, ensure_ascii=False)
             add_metadata(data)
+            self.commit(response)
 
     def scrape_fao(self):
         url = "https://microdata.fao.org/index.php/catalog/2522/data-dictionary/F20"
         self.logger.info(f"Scraping FAO: {url}")
-        soup = self.get_soup(url)
-        if not soup:
+        output_path = os.path.join("data_collection", "web_content", "fao_dictionary.json")
+        response = self.fetch(url)
+        if not response or self.is_unchanged(response, output_path):
             return
+        soup = self.soup_from(response)
             
         title = "FAO Data Dictionary 2022-2023"
         content = soup.get_text()
@@ -94,8 +111,7 @@ class StatsScraper(BaseCrawler):
             }
         }
         
-        filename = "fao_dictionary.json"
-        output_path = os.path.join("data_collection", "web_content", filename)
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
         add_metadata(data)
+        self.commit(response)
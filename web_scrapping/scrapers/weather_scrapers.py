@@ -8,9 +8,11 @@ class WeatherScraper(BaseCrawler):
     def scrape_au_senegal(self):
         url = "https://www.au-senegal.com/le-climat-et-la-meteo,046.html"
         self.logger.info(f"Scraping Au-Senegal: {url}")
-        soup = self.get_soup(url)
-        if not soup:
+        output_path = os.path.join("data_collection", "web_content", "au_senegal_meteo.json")
+        response = self.fetch(url)
+        if not response or self.is_unchanged(response, output_path):
             return
+        soup = self.soup_from(response)
             
         title = soup.find('h1')
         title_text = title.get_text(strip=True) if title else "Le climat et la météo au Sénégal"
@@ -34,20 +36,21 @@ class WeatherScraper(BaseCrawler):
             }
         }
         
-        filename = "au_senegal_meteo.json"
-        output_path = os.path.join("data_collection", "web_content", filename)
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
             
         add_metadata(data)
+        self.commit(response)
         self.logger.info(f"Au-Senegal weather scrape completed.")
 
     def scrape_donnees_mondiales(self):
         url = "https://www.donneesmondiales.com/afrique/senegal/climat.php"
         self.logger.info(f"Scraping Donnees Mondiales: {url}")
-        soup = self.get_soup(url)
-        if not soup:
+        output_path = os.path.join("data_collection", "web_content", "donnees_mondiales_climat.json")
+        response = self.fetch(url)
+        if not response or self.is_unchanged(response, output_path):
             return
+        soup = self.soup_from(response)
             
         title = soup.find('h1')
         title_text = title.get_text(strip=True) if title else "Climat du Sénégal"
@@ -71,10 +74,9 @@ class WeatherScraper(BaseCrawler):
             }
         }
         
-        filename = "donnees_mondiales_climat.json"
-        output_path = os.path.join("data_collection", "web_content", filename)
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
             
         add_metadata(data)
+        self.commit(response)
         self.logger.info(f"Donnees Mondiales weather scrape completed.")
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+
+EXTRACTION_MANIFEST_PATH = os.path.join("data_collection", "extraction_manifest.json")
+
+def file_sha256(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+class ExtractionManifest:
+    """
+    Record of the PDFs already extracted, keyed by content hash + extractor version.
+
+    "files" maps each PDF file name to its size, mtime and sha256, so an unchanged
+    file is recognized from a single stat() without being read again.
+    "contents" maps each content key to the file whose name was used for the
+    extracted text, so byte-identical PDFs are extracted only once.
+    """
+
+    def __init__(self, extractor_version, path=EXTRACTION_MANIFEST_PATH):
+        self.path = path
+        self.extractor_version = str(extractor_version)
+        self.files = {}
+        self.contents = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.files = data.get("files", {})
+                self.contents = data.get("contents", {})
+            except (OSError, ValueError) as e:
+                print(f"Warning: unreadable extraction manifest {path} ({e}), starting from scratch.")
+
+    def content_key(self, filename, pdf_path):
+        """
+        Returns the content key of a PDF, hashing it only if its size or mtime changed,
+        and records the file.
+        """
+        stat = os.stat(pdf_path)
+        entry = self.files.get(filename)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(pdf_path)}
+            self.files[filename] = entry
+        return self.content_key_of(filename)
+
+    def content_key_of(self, filename):
+        return f"{self.files[filename]['sha256']}:{self.extractor_version}"
+
+    def owner(self, key):
+        """
+        Name of the PDF whose extracted text holds this content, or None if not extracted.
+        """
+        content = self.contents.get(key)
+        return content["source"] if content else None
+
+    def is_extracted(self, key, extracted_dir):
+        content = self.contents.get(key)
+        if content is None:
+            return False
+        # Nothing to re-read for PDFs without text; otherwise the text file must still exist
+        return content["text_file"] is None or os.path.exists(os.path.join(extracted_dir, content["text_file"]))
+
+    def record_content(self, key, filename, pages, has_text=True):
+        self.contents[key] = {
+            "source": filename,
+            "text_file": f"{filename}.txt" if has_text else None,
+            "pages": pages,
+        }
+
+    def orphaned(self, filenames):
+        """
+        Content keys still used by some of filenames whose text was written under the
+        name of a PDF that has since changed or disappeared: {key: file to extract it for}.
+        """
+        current = {name: self.content_key_of(name) for name in filenames if name in self.files}
+        orphans = {}
+        for name, key in current.items():
+            owner = self.owner(key)
+            if owner is not None and owner != name and current.get(owner) != key:
+                orphans.setdefault(key, name)
+        return orphans
+
+    def prune(self, filenames):
+        """
+        Forgets PDFs that are no longer present and content no PDF refers to.
+        """
+        names = set(filenames)
+        self.files = {name: entry for name, entry in self.files.items() if name in names}
+        used = {self.content_key_of(name) for name in self.files}
+        self.contents = {key: content for key, content in self.contents.items() if key in used}
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"extractor_version": self.extractor_version, "files": self.files,
+                       "contents": self.contents}, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+HTTP_CACHE_DIR = os.path.join("data_collection", "http_cache")
+
+def sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def _atomic_write(path, data, mode='wb'):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    encoding = None if 'b' in mode else 'utf-8'
+    with open(tmp_path, mode, encoding=encoding) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class HttpCache:
+    """
+    On-disk cache of HTTP responses with their validators (ETag, Last-Modified),
+    used to send conditional requests and to serve 304 Not Modified answers.
+
+    Each URL has a <sha256(url)>.json entry. Page bodies are stored next to it
+    (.body); downloaded files are not copied, the entry points to the file.
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url, suffix):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + suffix)
+
+    def get(self, url):
+        """
+        Returns the cache entry of url, or None if it is missing or its body is gone.
+        """
+        try:
+            with open(self._path(url, ".json"), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        body_path = entry.get("file") or self._path(url, ".body")
+        return entry if os.path.exists(body_path) else None
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def load_body(self, url):
+        with open(self._path(url, ".body"), 'rb') as f:
+            return f.read()
+
+    def _entry(self, url, response, digest, file=None):
+        return {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type"),
+            "encoding": response.encoding,
+            "sha256": digest,
+            "file": file,
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def store(self, url, response):
+        """
+        Caches a page body; returns its sha256.
+        """
+        digest = sha256_bytes(response.content)
+        _atomic_write(self._path(url, ".body"), response.content)
+        _atomic_write(self._path(url, ".json"), json.dumps(self._entry(url, response, digest)), 'w')
+        return digest
+
+    def store_file(self, url, response, path, digest):
+        """
+        Records the validators of a file downloaded to path.
+        """
+        entry = self._entry(url, response, digest, file=os.path.abspath(path))
+        _atomic_write(self._path(url, ".json"), json.dumps(entry), 'w')
+
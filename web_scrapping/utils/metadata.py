@@ -1,41 +1,192 @@
 import json
 import os
+import sqlite3
+from collections import Counter
+from contextlib import closing
 from datetime import datetime
 
-METADATA_PATH = os.path.join("data_collection", "metadata.json")
+# Resolved from this file, so the store is found whatever the working directory
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data_collection")
+# JSON snapshot of the records (legacy format, still read when the store is missing)
+METADATA_PATH = os.path.join(DATA_DIR, "metadata.json")
+# Indexed store: one row per source_url, written in place instead of rewriting a file
+METADATA_DB_PATH = os.path.join(DATA_DIR, "metadata.sqlite3")
+# Precomputed corpus statistics ("collection" section written by the scrapers,
+# "index" section by the index builder)
+CORPUS_STATS_PATH = os.path.join(DATA_DIR, "corpus_stats.json")
+# Seconds a writer waits while another process holds the write lock
+LOCK_TIMEOUT = 30
 
-def initialize_metadata():
+_initialized = set()
+
+def _paths(data_dir):
+    if data_dir is None:
+        return METADATA_DB_PATH, METADATA_PATH
+    return os.path.join(data_dir, "metadata.sqlite3"), os.path.join(data_dir, "metadata.json")
+
+def _connect(db_path):
+    # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE,
+    # which takes SQLite's write lock so concurrent scrapers queue instead of failing
+    conn = sqlite3.connect(db_path, timeout=LOCK_TIMEOUT, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+def _prepare(entry):
+    if "timestamp" not in entry:
+        entry["timestamp"] = datetime.now().isoformat()
+    return entry.get("source_url"), json.dumps(entry, ensure_ascii=False)
+
+def _upsert(conn, entries):
+    # Entries without source_url cannot be matched and are always appended
+    conn.executemany(
+        """
+        INSERT INTO metadata (source_url, entry) VALUES (?, ?)
+        ON CONFLICT(source_url) DO UPDATE SET entry = excluded.entry
+        """,
+        [_prepare(entry) for entry in entries]
+    )
+
+def initialize_metadata(data_dir=None):
     """
-    Initializes the metadata file if it doesn't exist.
+    Creates the metadata store if it doesn't exist. Records of an existing
+    metadata.json are imported once (duplicate source_urls collapse to the last one).
     """
-    if not os.path.exists(METADATA_PATH):
-        with open(METADATA_PATH, 'w', encoding='utf-8') as f:
-            json.dump([], f, indent=4)
+    db_path, json_path = _paths(data_dir)
+    if db_path in _initialized and os.path.exists(db_path):
+        return
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    with closing(_connect(db_path)) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'metadata'"
+            ).fetchone()
+            if not exists:
+                # Also read (read-only) by the app: ia/src/utils/metadata.py
+                conn.execute("""
+                    CREATE TABLE metadata (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        source_url TEXT UNIQUE,
+                        entry TEXT NOT NULL
+                    )
+                """)
+                if os.path.exists(json_path):
+                    with open(json_path, 'r', encoding='utf-8') as f:
+                        _upsert(conn, json.load(f))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    _initialized.add(db_path)
 
-def add_metadata(entry):
+def add_metadata(entry, data_dir=None):
     """
-    Adds a new entry to the metadata record.
+    Adds an entry to the metadata record, or replaces the entry with the same
+    source_url (keeping its position).
     entry: dict following the structure defined in the prompt.
     """
-    initialize_metadata()
-    
-    with open(METADATA_PATH, 'r+', encoding='utf-8') as f:
-        data = json.load(f)
-        
-        # Add common metadata fields if missing
-        if "timestamp" not in entry:
-            entry["timestamp"] = datetime.now().isoformat()
-            
-        data.append(entry)
-        f.seek(0)
-        json.dump(data, f, indent=4, ensure_ascii=False)
-        f.truncate()
-
-def get_all_metadata():
+    add_metadata_many([entry], data_dir)
+
+def add_metadata_many(entries, data_dir=None):
+    """
+    Upserts several entries in a single transaction.
+    """
+    initialize_metadata(data_dir)
+    db_path, _ = _paths(data_dir)
+    with closing(_connect(db_path)) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _upsert(conn, entries)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+def iter_metadata(data_dir=None):
+    """
+    Yields the metadata records one at a time, in insertion order.
+    """
+    db_path, json_path = _paths(data_dir)
+    if os.path.exists(db_path):
+        # Read-only: never creates the store, and never waits for writers (WAL)
+        with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=LOCK_TIMEOUT)) as conn:
+            try:
+                rows = conn.execute("SELECT entry FROM metadata ORDER BY id")
+            except sqlite3.OperationalError:
+                # Store created but not initialized yet
+                rows = None
+            if rows is not None:
+                for (entry,) in rows:
+                    yield json.loads(entry)
+                return
+    if os.path.exists(json_path):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+def get_all_metadata(data_dir=None):
     """
     Returns the list of all metadata records.
     """
-    if not os.path.exists(METADATA_PATH):
-        return []
-    with open(METADATA_PATH, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return list(iter_metadata(data_dir))
+
+def export_metadata_json(data_dir=None):
+    """
+    Writes the records to metadata.json (one rewrite per run rather than per
+    record), for the readers of the JSON format.
+    """
+    _, json_path = _paths(data_dir)
+    records = get_all_metadata(data_dir)
+    tmp_path = json_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, json_path)
+    return len(records)
+
+def collection_stats(data_dir=None):
+    """
+    Number of collected documents, by category and by language.
+    """
+    by_category, by_language = Counter(), Counter()
+    total = 0
+    for entry in iter_metadata(data_dir):
+        metadata = entry.get("metadata") or {}
+        total += 1
+        by_category[metadata.get("category") or "unknown"] += 1
+        by_language[metadata.get("language") or "unknown"] += 1
+    return {
+        "documents": total,
+        "by_category": dict(by_category.most_common()),
+        "by_language": dict(by_language.most_common()),
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+def read_corpus_stats(path=CORPUS_STATS_PATH):
+    """
+    Returns the corpus statistics, or {} if they were never written.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def update_corpus_stats(section, values, path=CORPUS_STATS_PATH):
+    """
+    Replaces one section ("collection" or "index") of the corpus statistics.
+    """
+    stats = read_corpus_stats(path)
+    stats[section] = values
+    # Per-process temporary file: the scrapers and the index builder both update it
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def write_collection_stats(data_dir=None):
+    """
+    Updates the "collection" section of the corpus statistics from the metadata store.
+    """
+    path = CORPUS_STATS_PATH if data_dir is None else os.path.join(data_dir, "corpus_stats.json")
+    stats = collection_stats(data_dir)
+    update_corpus_stats("collection", stats, path)
+    return stats
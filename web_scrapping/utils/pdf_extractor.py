@@ -1,22 +1,103 @@
 import fitz  # PyMuPDF
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from .cleaning import clean_text
 
-def extract_text_from_pdf(pdf_path):
+# Bump when the extracted text changes (extraction or cleaning), so that every PDF
+# is extracted again (see utils.extraction_manifest)
+EXTRACTOR_VERSION = 1
+
+# Pages extracted per task in parallel mode: small enough to spread one large
+# report over every worker, large enough to amortize reopening the file
+PAGES_PER_TASK = 8
+
+def extract_text_from_pdf(pdf_path, return_page_count=False):
     """
     Extracts text from a PDF file using PyMuPDF.
+    With return_page_count=True, returns (text, number of pages).
     """
     if not os.path.exists(pdf_path):
-        return ""
+        return ("", 0) if return_page_count else ""
     
     doc = fitz.open(pdf_path)
-    full_text = ""
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        full_text += page.get_text()
-    
+    pages = [doc.load_page(page_num).get_text() for page_num in range(len(doc))]
     doc.close()
-    return clean_text(full_text)
+    text = clean_text("".join(pages))
+    return (text, len(pages)) if return_page_count else text
+
+def _count_pages(pdf_path):
+    with fitz.open(pdf_path) as doc:
+        return len(doc)
+
+def _extract_pages(pdf_path, start, stop):
+    """
+    Raw text of pages [start, stop) of a PDF (worker process task).
+    """
+    with fitz.open(pdf_path) as doc:
+        return [doc.load_page(page_num).get_text() for page_num in range(start, min(stop, len(doc)))]
+
+def extract_pdfs_parallel(pdf_paths, workers=None, pages_per_task=PAGES_PER_TASK):
+    """
+    Extracts several PDFs with a process pool, splitting every PDF into page
+    ranges so that large reports are spread across all workers.
+
+    Yields (pdf_path, text, page_count, error) as soon as every page of a PDF is
+    extracted; pages are joined in order. text is None when extraction failed.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts, remaining, futures = {}, {}, {}
+        for pdf_path in pdf_paths:
+            try:
+                count = _count_pages(pdf_path)
+            except Exception as e:
+                yield pdf_path, None, 0, e
+                continue
+            starts = list(range(0, count, pages_per_task))
+            if not starts:
+                yield pdf_path, "", 0, None
+                continue
+            parts[pdf_path] = [None] * len(starts)
+            remaining[pdf_path] = len(starts)
+            for i, start in enumerate(starts):
+                future = pool.submit(_extract_pages, pdf_path, start, start + pages_per_task)
+                futures[future] = (pdf_path, i)
+        
+        failed = set()
+        for future in as_completed(futures):
+            pdf_path, i = futures[future]
+            if pdf_path in failed:
+                continue
+            try:
+                parts[pdf_path][i] = future.result()
+            except Exception as e:
+                failed.add(pdf_path)
+                yield pdf_path, None, 0, e
+                continue
+            remaining[pdf_path] -= 1
+            if remaining[pdf_path] == 0:
+                pages = [page for part in parts.pop(pdf_path) for page in part]
+                yield pdf_path, clean_text("".join(pages)), len(pages), None
+
+class ThroughputMeter:
+    """
+    Counts extracted pages and reports pages/sec.
+    """
+
+    def __init__(self):
+        self.pages = 0
+        self.start = time.perf_counter()
+
+    def add(self, pages):
+        self.pages += pages
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.start
+        return self.pages / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.start
+        return f"{self.pages} pages in {elapsed:.1f}s ({self.rate():.1f} pages/s)"
 
 def save_extracted_text(text, filename, output_dir=None):
     """